@@ -0,0 +1,33 @@
+"""
+Gunicorn profile for the ASGI entry point, with uvicorn workers:
+
+    gunicorn BRS.asgi:application -c BRS/gunicorn_asgi.py
+
+Each worker runs one event loop. The async endpoints (/api/async/...) wait
+on the database and on slow clients without holding a thread, so a worker
+per core is enough. Sync views still work; Django runs them in a thread pool.
+Leave CONN_MAX_AGE at 0 under ASGI: connections are per thread, not per worker.
+
+Workers only share cache entries through a shared CACHE_BACKEND (Redis,
+Memcached). With the default LocMemCache, writes made in one worker reach
+the ETags, indexes and cached searches of the others within CACHE_VERSION_TTL.
+"""
+
+import multiprocessing
+
+from decouple import config
+
+bind = config("GUNICORN_BIND", default="0.0.0.0:8000")
+workers = config("GUNICORN_WORKERS", default=multiprocessing.cpu_count(), cast=int)
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# Slow clients are cheap on an event loop; only stuck requests hit the timeout
+timeout = config("GUNICORN_TIMEOUT", default=30, cast=int)
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then (in-process indexes and caches are rebuilt)
+max_requests = 10000
+max_requests_jitter = 1000
+
+accesslog = "-"
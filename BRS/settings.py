@@ -100,6 +100,17 @@ DATABASES = {
     }
 }
 
+# Cache (per-process memory by default; point CACHE_BACKEND / CACHE_LOCATION
+# at a shared backend such as Redis or Memcached when running more than one
+# worker, see `manage.py check --deploy`)
+CACHES = {
+    "default": {
+        "BACKEND": config("CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": config("CACHE_LOCATION", default="bus-reservation"),
+        "TIMEOUT": config("CACHE_TIMEOUT", default=300, cast=int),
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -148,11 +159,20 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Django REST Framework configuration
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "bus_app.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    # Proxies in front of the app that append to X-Forwarded-For; with 0 the
+    # client IP (and the anonymous throttle key) is REMOTE_ADDR
+    "NUM_PROXIES": config("NUM_PROXIES", default=0, cast=int),
+    # Per-view rates for bus_app.throttling.SlidingWindowThrottle (`throttle_scope`)
+    "DEFAULT_THROTTLE_RATES": {
+        "login": config("THROTTLE_LOGIN_RATE", default="10/min"),
+        "register": config("THROTTLE_REGISTER_RATE", default="5/hour"),
+        "booking": config("THROTTLE_BOOKING_RATE", default="30/min"),
+    },
 }
 
 SIMPLE_JWT = {
@@ -167,3 +187,28 @@ SIMPLE_JWT = {
 LOGIN_URL = "login"
 LOGIN_REDIRECT_URL = "home-page"
 LOGOUT_REDIRECT_URL = "welcome-page"
+
+# Expired seat holds (see `manage.py expire_holds`)
+HOLD_SWEEP_INTERVAL = config("HOLD_SWEEP_INTERVAL", default=30, cast=int)  # seconds
+HOLD_SWEEP_BATCH_SIZE = config("HOLD_SWEEP_BATCH_SIZE", default=500, cast=int)
+
+# Lifetime of cache version keys (ETags, city and journey indexes, response
+# cache tags) on a per-process cache: how long other processes can miss a bump
+CACHE_VERSION_TTL = config("CACHE_VERSION_TTL", default=30, cast=int)  # seconds
+
+# Cached trip search responses (see bus_app.response_cache)
+RESPONSE_CACHE_TTL = config("RESPONSE_CACHE_TTL", default=60, cast=int)  # seconds
+
+# Idempotency-Key replay window (see bus_app.idempotency, `manage.py purge_idempotency_keys`)
+IDEMPOTENCY_KEY_TTL = config("IDEMPOTENCY_KEY_TTL", default=24 * 3600, cast=int)  # seconds
+IDEMPOTENCY_PURGE_BATCH_SIZE = config("IDEMPOTENCY_PURGE_BATCH_SIZE", default=1000, cast=int)
+# A retry may take over a key whose first request hasn't finished after this long
+# (keep it above the worker timeout)
+IDEMPOTENCY_LEASE_SECONDS = config("IDEMPOTENCY_LEASE_SECONDS", default=120, cast=int)
+
+# Seconds a JWT-authenticated user row stays cached (see bus_app.authentication)
+JWT_USER_CACHE_TTL = config("JWT_USER_CACHE_TTL", default=60, cast=int)
+
+# Rate limit counters: "locmem" (per process), "database" or "cache" (see bus_app.throttling)
+THROTTLE_STORAGE = config("THROTTLE_STORAGE", default="cache")
+THROTTLE_CACHE_ALIAS = config("THROTTLE_CACHE_ALIAS", default="default")
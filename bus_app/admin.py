@@ -1,6 +1,6 @@
 from django.contrib import admin
-from django.db.models import Count
-from .models import Booking, Bus, Route, Trip
+from .models import Booking, Bus, City, CityAlias, Route, Trip
+from .services import recount_seats_taken
 
 
 # -------------------------------
@@ -22,6 +22,23 @@ class BusAdmin(admin.ModelAdmin):
     ordering = ("id",)
 
 
+# -------------------------------
+# City Admin
+# -------------------------------
+class CityAliasInline(admin.TabularInline):
+    model = CityAlias
+    extra = 1
+
+
+@admin.register(City)
+class CityAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "normalized_name", "created_at")
+    search_fields = ("name", "aliases__name")
+    readonly_fields = ("normalized_name", "created_at", "updated_at")
+    inlines = [CityAliasInline]
+    ordering = ("name",)
+
+
 # -------------------------------
 # Route Admin
 # -------------------------------
@@ -32,10 +49,13 @@ class RouteAdmin(admin.ModelAdmin):
         "route_name",
         "location_from",
         "location_to",
+        "origin",
+        "destination",
         "created_at",
     )
+    list_select_related = ("origin", "destination")
     search_fields = ("location_from", "location_to", "route_name")
-    readonly_fields = ("route_name", "created_at", "updated_at")
+    readonly_fields = ("route_name", "origin", "destination", "created_at", "updated_at")
     ordering = ("id",)
 
 
@@ -60,19 +80,16 @@ class TripAdmin(admin.ModelAdmin):
     list_filter = ("route", "bus", "is_active", "status")
     search_fields = ("route__route_name", "bus__bus_number")
     ordering = ("departure_time",)
-    readonly_fields = ("created_at", "updated_at")
-
-    def get_queryset(self, request):
-        qs = super().get_queryset(request)
-        return qs.annotate(booked_count=Count("bookings"))
+    readonly_fields = ("seats_taken", "created_at", "updated_at")
+    list_select_related = ("route", "bus")
 
     def booked_seat_count(self, obj):
-        return obj.booked_count
+        return obj.seats_taken
 
     booked_seat_count.short_description = "Booked Seats"
 
     def remaining_seats(self, obj):
-        return obj.bus.capacity - obj.booked_count
+        return obj.seats_left
 
     remaining_seats.short_description = "Available Seats"
 
@@ -97,3 +114,17 @@ class BookingAdmin(admin.ModelAdmin):
     ordering = ("id",)
     list_select_related = ("user", "trip")
     readonly_fields = ("booking_time", "created_at", "updated_at")
+
+    # Admin edits bypass the booking services, so recount the affected trip
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        recount_seats_taken(Trip.objects.filter(pk=obj.trip_id))
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        recount_seats_taken(Trip.objects.filter(pk=obj.trip_id))
+
+    def delete_queryset(self, request, queryset):
+        trip_ids = list(queryset.values_list("trip_id", flat=True).distinct())
+        super().delete_queryset(request, queryset)
+        recount_seats_taken(Trip.objects.filter(pk__in=trip_ids))
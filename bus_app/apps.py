@@ -5,6 +5,6 @@ class BusAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "bus_app"
 
-
-def ready(self):  # noqa
-    import bus_app.signals  # noqa
+    def ready(self):  # noqa
+        import bus_app.checks  # noqa
+        import bus_app.signals  # noqa
@@ -0,0 +1,201 @@
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.views import View
+
+from rest_framework import exceptions, status
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .authentication import CachedJWTAuthentication
+from .etags import etag_matches, trip_etag
+from .fast_serializers import FastBookingSerializer, FastTripSerializer
+from .models import Trip
+from .pagination import AsyncPageNumberMixin, KeysetPagination, wants_cursor_pagination
+from .response_cache import trip_search_cache
+from .seats import SeatAvailability
+from .serializers import parse_field_selection
+from .views import MyBookingsAPIView, TripListAPIView, TripPagination
+
+
+# -----------------------
+# ASYNC API BASE
+# -----------------------
+class AsyncAPIView(View):
+    """
+    Async counterpart of APIView for the ASGI deployment (BRS/gunicorn_asgi.py).
+
+    Handlers are coroutines that query through Django's async ORM, so a
+    worker's event loop keeps serving other clients while one waits on the
+    database or on a slow client. Authentication, permissions and JSON
+    rendering are DRF's own, so responses match the sync endpoints.
+    """
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    http_method_names = ["get", "head", "options"]
+
+    async def dispatch(self, request, *args, **kwargs):
+        request = Request(request, authenticators=[auth() for auth in self.authentication_classes])
+        try:
+            # Authentication may hit the database: resolve it in a thread
+            await sync_to_async(self.check_permissions)(request)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            return await handler(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            headers = {}
+            if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+                if request.authenticators:
+                    headers["WWW-Authenticate"] = request.authenticators[0].authenticate_header(request)
+                else:
+                    exc.status_code = status.HTTP_403_FORBIDDEN
+            # Same body as DRF's exception handler
+            data = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+            return self.respond(data, status=exc.status_code, headers=headers)
+
+    def check_permissions(self, request):
+        for permission in [permission() for permission in self.permission_classes]:
+            if not permission.has_permission(request, self):
+                if request.authenticators and not request.successful_authenticator:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, "message", None))
+
+    @staticmethod
+    def respond(data=None, status=status.HTTP_200_OK, headers=None):
+        response = Response(data, status=status, headers=headers)
+        response.accepted_renderer = JSONRenderer()
+        response.accepted_media_type = JSONRenderer.media_type
+        response.renderer_context = {}
+        return response.render()
+
+
+class AsyncTripPagination(AsyncPageNumberMixin, TripPagination):
+    pass
+
+
+class AsyncBookingPagination(AsyncPageNumberMixin, PageNumberPagination):
+    page_size = 10  # as MyBookingsAPIView
+
+
+# -----------------------
+# TRIPS
+# -----------------------
+class AsyncTripListAPIView(AsyncAPIView):
+    """
+    Async TripListAPIView: same parameters, caching, ETags and JSON.
+    """
+    permission_classes = [IsAdminUser]  # as TripListAPIView
+
+    async def get(self, request):
+        params = request.query_params
+        selection = parse_field_selection(params, default_expand=["available_seats"])
+
+        if params.get("trip_id"):
+            return await self.get_one(request, params["trip_id"], selection)
+        if params.get("ids"):
+            return await self.get_many(request, selection)
+
+        # -------- Cached Response --------
+        cache_versions = await sync_to_async(trip_search_cache.versions_for)(params)
+        cached = await sync_to_async(trip_search_cache.get)(request, cache_versions)
+        if cached is not None:
+            data, etag = cached
+            if etag_matches(request, etag):
+                return self.respond(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+            return self.respond(data, headers={"ETag": etag})
+
+        # City / full-text resolution may build in-memory indexes from the database
+        try:
+            trips, sort_field, cursor_mode = await sync_to_async(TripListAPIView.search_queryset)(params)
+        except ValidationError as e:
+            return self.respond({"error": e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+        if cursor_mode:
+            id_field = "-id" if sort_field.startswith("-") else "id"
+            paginator = KeysetPagination(ordering=(sort_field, id_field))
+        else:
+            paginator = AsyncTripPagination()
+        serializer = FastTripSerializer(context=selection)
+        rows = serializer.values(trips, sort_field.lstrip("-"), "id")
+        page = await paginator.apaginate_queryset(rows, request)
+        data = paginator.get_paginated_response(await serializer.aserialize(page)).data
+        etag = await sync_to_async(trip_search_cache.set)(request, cache_versions, data)
+        return self.respond(data, headers={"ETag": etag})
+
+    async def get_one(self, request, trip_id, selection):
+        if not trip_id.isdigit():
+            return self.respond({"error": "Trip not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        etag = await sync_to_async(trip_etag)(trip_id, variant=selection)
+        if etag_matches(request, etag):
+            return self.respond(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        serializer = FastTripSerializer(context=selection)
+        row = await serializer.values(Trip.objects.filter(pk=trip_id, is_active=True)).afirst()
+        if row is None:
+            return self.respond({"error": "Trip not found"}, status=status.HTTP_404_NOT_FOUND)
+        data = await serializer.aserialize([row])
+        return self.respond(data[0], headers={"ETag": etag})
+
+    async def get_many(self, request, selection):
+        try:
+            trip_ids = TripListAPIView.parse_ids(request.query_params)
+        except ValidationError as e:
+            return self.respond({"error": e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = FastTripSerializer(context=selection)
+        rows = serializer.values(Trip.objects.filter(pk__in=trip_ids, is_active=True), "id")
+        by_id = {row["id"]: row async for row in rows}
+
+        return self.respond({
+            "results": await serializer.aserialize(by_id[pk] for pk in trip_ids if pk in by_id),
+            "missing": [pk for pk in trip_ids if pk not in by_id],
+        })
+
+
+class AsyncTripSeatsAPIView(AsyncAPIView):
+    """
+    Free seats of one trip (for seat pickers polling availability).
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    async def get(self, request, trip_id):
+        trip = await Trip.objects.filter(pk=trip_id, is_active=True).values("bus__capacity").afirst()
+        if trip is None:
+            return self.respond({"error": "Trip not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        availability = await SeatAvailability.aload([trip_id])
+        seat_map = availability.seat_map(trip_id, trip["bus__capacity"])
+        return self.respond({
+            "trip": trip_id,
+            "capacity": seat_map.capacity,
+            "available_count": seat_map.free_count,
+            "available_seats": list(seat_map),
+        })
+
+
+# -----------------------
+# MY BOOKINGS
+# -----------------------
+class AsyncMyBookingsAPIView(AsyncAPIView):
+    """
+    Async MyBookingsAPIView: same filters, pagination and JSON.
+    """
+
+    async def get(self, request):
+        bookings = MyBookingsAPIView.user_bookings(request.user, request.query_params)
+
+        if wants_cursor_pagination(request.query_params):
+            paginator = KeysetPagination(ordering=("-created_at", "-id"))
+        else:
+            paginator = AsyncBookingPagination()
+
+        serializer = FastBookingSerializer(context=parse_field_selection(request.query_params))
+        rows = serializer.values(bookings, "created_at", "id")
+        page = await paginator.apaginate_queryset(rows, request)
+        return self.respond(paginator.get_paginated_response(await serializer.aserialize(page)).data)
@@ -0,0 +1,49 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+
+# Backends whose entries live inside one process
+PROCESS_LOCAL_BACKENDS = {"django.core.cache.backends.locmem.LocMemCache"}
+
+
+def cache_is_shared(alias=DEFAULT_CACHE_ALIAS):
+    """
+    True when every process sees the same entries in cache `alias`.
+    """
+    return settings.CACHES[alias]["BACKEND"] not in PROCESS_LOCAL_BACKENDS
+
+
+def version_timeout():
+    """
+    Lifetime of a version key. Unlimited on a shared cache; on a per-process
+    cache a bump made by another process (a worker or a management command)
+    can't reach this one, so the key expires after CACHE_VERSION_TTL instead.
+    """
+    return None if cache_is_shared() else settings.CACHE_VERSION_TTL
+
+
+def get_versions(keys):
+    """
+    Current version stored under each of `keys` (created on first use).
+    """
+    found = cache.get_many(keys)
+    timeout = version_timeout()
+    for key in keys:
+        if key not in found:
+            version = uuid.uuid4().hex
+            if not cache.add(key, version, timeout):
+                version = cache.get(key, version)
+            found[key] = version
+    return found
+
+
+def get_version(key):
+    return get_versions([key])[key]
+
+
+def bump_versions(keys):
+    """
+    Give each of `keys` a new version.
+    """
+    cache.set_many({key: uuid.uuid4().hex for key in keys}, version_timeout())
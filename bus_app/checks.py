@@ -0,0 +1,24 @@
+from django.core.checks import Tags, Warning, register
+
+from .cache_versions import cache_is_shared
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Cache versions only reach every worker through a shared cache.
+    """
+    if cache_is_shared():
+        return []
+    return [
+        Warning(
+            "The default cache is per process (LocMemCache).",
+            hint=(
+                "With more than one worker, point CACHE_BACKEND at a shared backend such "
+                "as Redis or Memcached. Otherwise trip ETags, the city and journey indexes "
+                "and cached trip searches lag up to CACHE_VERSION_TTL seconds behind writes "
+                "made in other processes, and rate limits and /api/cache/stats/ are per worker."
+            ),
+            id="bus_app.W001",
+        )
+    ]
@@ -0,0 +1,166 @@
+import threading
+from bisect import bisect_left
+
+from django.core.cache import cache
+
+from .cache_versions import bump_versions, get_version
+from .models import City, CityAlias, Trip, normalize_city_name
+
+CITY_CATALOGUE_CACHE_KEY = "bus_app:city_catalogue"
+# Upper bound on staleness as trips depart; saves invalidate immediately
+CITY_CATALOGUE_TTL = 60 * 60
+
+# Bumped whenever a City or CityAlias changes. Processes sharing the cache
+# rebuild on their next lookup; with a per-process cache the others only
+# notice once their copy of the key expires (CACHE_VERSION_TTL)
+CITY_INDEX_VERSION_KEY = "bus_app:city_index_version"
+
+
+# -------------------------------
+# CITY PREFIX INDEX
+# -------------------------------
+class CityIndex:
+    """
+    In-memory prefix index over city names, aliases and name words.
+
+    Keys are kept sorted, so the cities matching a prefix are one
+    contiguous run found with a binary search.
+    """
+
+    def __init__(self, cities, aliases=()):
+        # city id -> canonical name
+        self.names = {}
+        keys = set()
+        for city_id, name in cities:
+            self.names[city_id] = name
+            key = normalize_city_name(name)
+            keys.add((key, city_id))
+            # "Dera Ghazi Khan" is also found by "ghazi"
+            for word in key.split()[1:]:
+                keys.add((word, city_id))
+        for city_id, alias in aliases:
+            keys.add((normalize_city_name(alias), city_id))
+        self._keys = sorted(keys)
+
+    @classmethod
+    def build(cls):
+        return cls(
+            City.objects.values_list("id", "name"),
+            CityAlias.objects.values_list("city_id", "name"),
+        )
+
+    def lookup(self, text):
+        """
+        Ids of cities whose name, alias or a name word starts with `text`,
+        exact matches first.
+        """
+        prefix = normalize_city_name(text or "")
+        if not prefix:
+            return []
+
+        exact, partial = [], []
+        position = bisect_left(self._keys, (prefix,))
+        while position < len(self._keys):
+            key, city_id = self._keys[position]
+            if not key.startswith(prefix):
+                break
+            target = exact if key == prefix else partial
+            if city_id not in exact and city_id not in partial:
+                target.append(city_id)
+            position += 1
+        return exact + partial
+
+    def __len__(self):
+        return len(self.names)
+
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def get_city_index():
+    """
+    Per-process CityIndex, rebuilt when the cached version key changes.
+    """
+    global _index, _index_version
+
+    version = get_version(CITY_INDEX_VERSION_KEY)
+
+    if _index is None or _index_version != version:
+        with _index_lock:
+            if _index is None or _index_version != version:
+                _index = CityIndex.build()
+                _index_version = version
+    return _index
+
+
+def invalidate_city_index():
+    bump_versions([CITY_INDEX_VERSION_KEY])
+
+
+def resolve_city_ids(text):
+    """
+    City ids matching free text such as "pindi" or "Lah".
+    """
+    return get_city_index().lookup(text)
+
+
+# -------------------------------
+# CITY CATALOGUE
+# -------------------------------
+def build_city_catalogue():
+    """
+    Origin/destination cities of upcoming trips, from one DISTINCT query.
+    """
+    pairs = (
+        Trip.objects.upcoming()
+        .order_by()
+        .values_list("route__origin__name", "route__destination__name")
+        .distinct()
+    )
+
+    from_cities, to_cities = set(), set()
+    for origin, destination in pairs:
+        if origin:
+            from_cities.add(origin)
+        if destination:
+            to_cities.add(destination)
+
+    return {
+        "from": sorted(from_cities),
+        "to": sorted(to_cities),
+        "all": sorted(from_cities | to_cities),
+    }
+
+
+def get_city_catalogue():
+    catalogue = cache.get(CITY_CATALOGUE_CACHE_KEY)
+    if catalogue is None:
+        catalogue = build_city_catalogue()
+        cache.set(CITY_CATALOGUE_CACHE_KEY, catalogue, CITY_CATALOGUE_TTL)
+    return catalogue
+
+
+def invalidate_city_catalogue():
+    cache.delete(CITY_CATALOGUE_CACHE_KEY)
+
+
+def autocomplete_cities(text, direction="all", limit=10):
+    """
+    Catalogue cities matching `text`: name and alias prefixes first
+    (so "pindi" suggests Rawalpindi), then substrings.
+    """
+    cities = get_city_catalogue().get(direction, [])
+    text = (text or "").strip().casefold()
+    if not text:
+        return cities[:limit]
+
+    served = set(cities)
+    index = get_city_index()
+    prefix = [
+        name for name in (index.names[city_id] for city_id in index.lookup(text))
+        if name in served
+    ]
+    inner = [city for city in cities if text in city.casefold() and city not in prefix]
+    return (prefix + inner)[:limit]
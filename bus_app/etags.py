@@ -0,0 +1,64 @@
+import hashlib
+import json
+
+from django.utils.http import parse_etags, quote_etag
+from rest_framework.utils.encoders import JSONEncoder
+
+from .cache_versions import bump_versions, get_version
+
+TRIP_VERSION_KEY = "bus_app:trip_version:{trip_id}"
+
+
+# -------------------------------
+# PER-TRIP VERSIONS
+# -------------------------------
+def trip_version(trip_id):
+    """
+    Current version of a trip's representation (created on first use).
+    """
+    return get_version(TRIP_VERSION_KEY.format(trip_id=trip_id))
+
+
+def bump_trip_versions(trip_ids):
+    """
+    Change the ETag of these trips (call after the write has committed).
+    """
+    bump_versions([TRIP_VERSION_KEY.format(trip_id=trip_id) for trip_id in trip_ids])
+
+
+def trip_etag(trip_id, variant=None):
+    """
+    `variant` distinguishes representations of the same trip version,
+    e.g. the ?fields= / ?expand= selection.
+    """
+    etag = f"trip-{trip_id}-{trip_version(trip_id)}"
+    if variant:
+        raw = json.dumps(variant, sort_keys=True, default=sorted)
+        etag += "-" + hashlib.sha256(raw.encode()).hexdigest()[:8]
+    return quote_etag(etag)
+
+
+def data_etag(data):
+    """
+    Strong ETag of a serialised payload.
+    """
+    raw = json.dumps(data, cls=JSONEncoder, sort_keys=True, separators=(",", ":"))
+    return quote_etag(hashlib.sha256(raw.encode()).hexdigest()[:32])
+
+
+# -------------------------------
+# CONDITIONAL GET
+# -------------------------------
+def etag_matches(request, etag):
+    """
+    True when the request's If-None-Match already names `etag`
+    (weak comparison, as RFC 9110 requires for If-None-Match).
+    """
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    candidates = parse_etags(header)
+    if "*" in candidates:
+        return True
+    etag = etag.removeprefix("W/")
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
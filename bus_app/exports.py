@@ -0,0 +1,120 @@
+import csv
+from datetime import date, datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Booking, Trip
+from .utils import filter_trips_by_date
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+DEFAULT_CHUNK_SIZE = 2000
+
+# column name -> value path
+TRIP_EXPORT_FIELDS = {
+    "id": "id",
+    "route": "route__route_name",
+    "origin": "route__origin__name",
+    "destination": "route__destination__name",
+    "bus_number": "bus__bus_number",
+    "capacity": "bus__capacity",
+    "departure_time": "departure_time",
+    "arrival_time": "arrival_time",
+    "price": "price",
+    "seats_taken": "seats_taken",
+    "status": "status",
+    "is_active": "is_active",
+}
+
+BOOKING_EXPORT_FIELDS = {
+    "id": "id",
+    "trip_id": "trip_id",
+    "route": "trip__route__route_name",
+    "departure_time": "trip__departure_time",
+    "bus_number": "trip__bus__bus_number",
+    "seat_number": "seat_number",
+    "username": "user__username",
+    "email": "user__email",
+    "payment_status": "payment_status",
+    "is_confirmed": "is_confirmed",
+    "is_cancelled": "is_cancelled",
+    "hold_expires_at": "hold_expires_at",
+    "created_at": "created_at",
+}
+
+
+# -------------------------------
+# QUERYSETS
+# -------------------------------
+def trip_export_queryset(*, date_from=None, date_to=None, route_id=None):
+    trips = Trip.objects.order_by("departure_time", "id")
+    if route_id:
+        trips = trips.filter(route_id=route_id)
+    return filter_trips_by_date(trips, date_from=date_from, date_to=date_to)
+
+
+def booking_export_queryset(*, date_from=None, date_to=None, trip_id=None):
+    """
+    Bookings whose trip departs within [date_from, date_to].
+    """
+    bookings = Booking.objects.order_by("trip__departure_time", "trip_id", "seat_number", "id")
+    if trip_id:
+        bookings = bookings.filter(trip_id=trip_id)
+    if date_from or date_to:
+        trips = filter_trips_by_date(Trip.objects.all(), date_from=date_from, date_to=date_to)
+        bookings = bookings.filter(trip__in=trips)
+    return bookings
+
+
+# -------------------------------
+# STREAMING WRITERS
+# -------------------------------
+class _Echo:
+    """
+    File-like object whose write() hands the line back to the caller.
+    """
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset, fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Tuples of `fields` values, fetched `chunk_size` rows at a time through a
+    server-side cursor (where the database supports one), so memory stays
+    flat however many rows there are.
+    """
+    return queryset.values_list(*fields.values()).iterator(chunk_size=chunk_size)
+
+
+def ndjson_lines(rows, fields):
+    columns = list(fields)
+    encoder = DjangoJSONEncoder(separators=(",", ":"))
+    for row in rows:
+        yield encoder.encode(dict(zip(columns, row))) + "\n"
+
+
+def _csv_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def csv_lines(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(list(fields))
+    for row in rows:
+        yield writer.writerow([_csv_value(value) for value in row])
+
+
+def stream_export(queryset, fields, export_format, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Lines of an NDJSON or CSV export of `queryset`.
+    """
+    rows = export_rows(queryset, fields, chunk_size)
+    if export_format == "csv":
+        return csv_lines(rows, fields)
+    return ndjson_lines(rows, fields)
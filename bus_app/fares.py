@@ -0,0 +1,101 @@
+import uuid
+from datetime import date
+
+from django.core.cache import cache
+from django.db.models import Count, F, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Trip
+from .utils import start_of_day
+
+FARE_CALENDAR_CACHE_KEY = "bus_app:fare_calendar:{route_id}:{version}:{month}"
+FARE_CALENDAR_VERSION_KEY = "bus_app:fare_calendar_version:{route_id}"
+# Upper bound on staleness as trips depart; trip and seat changes invalidate immediately
+FARE_CALENDAR_TTL = 10 * 60
+
+
+def month_bounds(month):
+    """
+    First day of `month` and of the month after it.
+    """
+    first = month.replace(day=1)
+    if first.month == 12:
+        return first, date(first.year + 1, 1, 1)
+    return first, date(first.year, first.month + 1, 1)
+
+
+# -------------------------------
+# FARE CALENDAR
+# -------------------------------
+def build_fare_calendar(route_id, month):
+    """
+    Per-day lowest fare and seats left for one route and month, from a
+    single GROUP BY query over upcoming trips.
+
+    `min_price` only considers trips that still have seats, so a sold-out
+    day has min_price None and seats_left 0.
+    """
+    first, after = month_bounds(month)
+    has_seats = Q(seats_taken__lt=F("bus__capacity"))
+
+    rows = (
+        Trip.objects.upcoming()
+        .exclude(status="cancelled")
+        .filter(
+            route_id=route_id,
+            departure_time__gte=start_of_day(first),
+            departure_time__lt=start_of_day(after),
+        )
+        .annotate(day=TruncDate("departure_time", tzinfo=timezone.get_current_timezone()))
+        .values("day")
+        .annotate(
+            min_price=Min("price", filter=has_seats),
+            seats_left=Sum(F("bus__capacity") - F("seats_taken"), filter=has_seats),
+            trips=Count("pk"),
+        )
+        .order_by("day")
+    )
+
+    return [
+        {
+            "date": row["day"],
+            "min_price": row["min_price"],
+            "seats_left": row["seats_left"] or 0,
+            "trips": row["trips"],
+        }
+        for row in rows
+    ]
+
+
+def _route_version(route_id):
+    key = FARE_CALENDAR_VERSION_KEY.format(route_id=route_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, None):
+            version = cache.get(key)
+    return version
+
+
+def get_fare_calendar(route_id, month):
+    key = FARE_CALENDAR_CACHE_KEY.format(
+        route_id=route_id,
+        version=_route_version(route_id),
+        month=f"{month:%Y-%m}",
+    )
+    days = cache.get(key)
+    if days is None:
+        days = build_fare_calendar(route_id, month)
+        cache.set(key, days, FARE_CALENDAR_TTL)
+    return days
+
+
+def invalidate_fare_calendars(route_ids):
+    """
+    Drop every cached month of these routes (by bumping their version).
+    """
+    cache.set_many(
+        {FARE_CALENDAR_VERSION_KEY.format(route_id=route_id): uuid.uuid4().hex for route_id in route_ids},
+        None,
+    )
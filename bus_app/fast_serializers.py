@@ -0,0 +1,164 @@
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+
+from .seats import SeatAvailability
+from .serializers import BookingSerializer, TripSerializer
+
+# Plan entry kinds
+VALUE, METHOD, NESTED = "value", "method", "nested"
+
+
+# ----------------------------
+# VALUES() SERIALIZER BASE
+# ----------------------------
+class ValuesSerializer:
+    """
+    Read-only fast path for a DRF serializer that renders `.values()` rows.
+
+    The field plan is compiled once from `serializer_class`: every plain
+    field becomes a (value path, field.to_representation) pair, nested
+    serializers become nested plans under a path prefix, and method fields
+    are served by `compile_<name>()` on the subclass. Rows are plain dicts,
+    so no model instances or per-row field objects are created, and the
+    output matches the DRF serializer's JSON.
+
+        fast = FastTripSerializer(context={...})
+        data = fast.serialize(fast.values(queryset))
+    """
+
+    serializer_class = None
+    # field name -> ValuesSerializer class for nested serializers
+    nested = {}
+
+    def __init__(self, context=None, prefix="", paths=None, prototype=None):
+        self.context = context or {}
+        self.prefix = prefix
+        # Value paths read by this serializer and its nested ones, in order
+        self.paths = paths if paths is not None else []
+        self.children = []
+        # Bound DRF serializer whose (possibly ?fields=-trimmed) fields we mirror
+        self.prototype = prototype or self.serializer_class(context=self.context)
+        self.plan = self.compile()
+
+    def path(self, local):
+        """
+        Register a value path (relative to this serializer) and return it.
+        """
+        path = self.prefix + local
+        if path not in self.paths:
+            self.paths.append(path)
+        return path
+
+    def compile(self):
+        plan = []
+        for name, field in self.prototype.fields.items():
+            if field.write_only:
+                continue
+
+            if isinstance(field, serializers.SerializerMethodField):
+                plan.append((name, METHOD, None, getattr(self, f"compile_{name}")()))
+            elif isinstance(field, serializers.BaseSerializer):
+                child = self.nested[name](
+                    context=self.context,
+                    prefix=f"{self.prefix}{'__'.join(field.source_attrs)}__",
+                    paths=self.paths,
+                    prototype=field,
+                )
+                self.children.append(child)
+                plan.append((name, NESTED, child.path("id"), child.to_representation))
+            elif isinstance(field, PrimaryKeyRelatedField):
+                # values() already yields the primary key
+                plan.append((name, VALUE, self.path("__".join(field.source_attrs)), None))
+            else:
+                path = self.path("__".join(field.source_attrs))
+                plan.append((name, VALUE, path, field.to_representation))
+        return plan
+
+    def prepare(self, rows):
+        """
+        Hook for batch work (e.g. one availability query) before rendering.
+        """
+        for child in self.children:
+            child.prepare(rows)
+
+    def to_representation(self, row):
+        ret = {}
+        for name, kind, path, render in self.plan:
+            if kind is METHOD:
+                ret[name] = render(row)
+            elif row[path] is None:
+                ret[name] = None
+            elif kind is NESTED:
+                ret[name] = render(row)
+            else:
+                ret[name] = row[path] if render is None else render(row[path])
+        return ret
+
+    def values(self, queryset, *extra):
+        """
+        `queryset.values()` with every path the plan reads, plus `extra`
+        columns (e.g. keyset pagination fields).
+        """
+        return queryset.values(*self.paths, *(path for path in extra if path not in self.paths))
+
+    def serialize(self, rows):
+        rows = list(rows)
+        self.prepare(rows)
+        return [self.to_representation(row) for row in rows]
+
+    async def aprepare(self, rows):
+        """
+        prepare() for async views (batch queries go through the async ORM).
+        """
+        for child in self.children:
+            await child.aprepare(rows)
+
+    async def aserialize(self, rows):
+        rows = list(rows)
+        await self.aprepare(rows)
+        return [self.to_representation(row) for row in rows]
+
+
+# ----------------------------
+# TRIP / BOOKING FAST PATHS
+# ----------------------------
+class FastTripSerializer(ValuesSerializer):
+    serializer_class = TripSerializer
+    needs_availability = False
+
+    def compile_available_seats(self):
+        self.needs_availability = True
+        id_path = self.path("id")
+        capacity_path = self.path("bus__capacity")
+
+        def available_seats(row):
+            seat_map = self.availability.seat_map(row[id_path], row[capacity_path])
+            return list(seat_map)
+
+        return available_seats
+
+    def prepare(self, rows):
+        super().prepare(rows)
+        if not self.needs_availability:
+            return  # available_seats not selected: no seat query
+        # Views serializing a page pass a SeatAvailability batch
+        self.availability = self.context.get("availability")
+        if self.availability is None:
+            self.availability = SeatAvailability(self.trip_ids(rows))
+
+    async def aprepare(self, rows):
+        await super().aprepare(rows)
+        if not self.needs_availability:
+            return
+        self.availability = self.context.get("availability")
+        if self.availability is None:
+            self.availability = await SeatAvailability.aload(self.trip_ids(rows))
+
+    def trip_ids(self, rows):
+        id_path = self.prefix + "id"
+        return {row[id_path] for row in rows if row[id_path] is not None}
+
+
+class FastBookingSerializer(ValuesSerializer):
+    serializer_class = BookingSerializer
+    nested = {"trip_detail": FastTripSerializer}
@@ -0,0 +1,172 @@
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+# Inserts tried before a key that keeps changing hands is answered with a 409
+CLAIM_ATTEMPTS = 3
+
+
+def request_fingerprint(request):
+    """
+    sha256 of what makes two requests "the same": method, path and body.
+    """
+    body = json.dumps(request.data, cls=JSONEncoder, sort_keys=True, separators=(",", ":"))
+    raw = f"{request.method}\n{request.path}\n{body}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _error(message, status_code):
+    return Response({"error": message}, status=status_code)
+
+
+def _replay(record):
+    response = Response(record.response_body, status=record.status_code)
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def _take_over(record, now):
+    """
+    Move an unfinished attempt's lease to this request. False if another
+    retry took it first or the original request finished meanwhile.
+    """
+    taken = IdempotencyKey.objects.filter(
+        pk=record.pk, status_code__isnull=True, claimed_at=record.claimed_at,
+    ).update(claimed_at=now)
+    record.claimed_at = now
+    return bool(taken)
+
+
+def _claim(user, key, fingerprint):
+    """
+    Insert the placeholder row for (user, key). Returns (record, created).
+    An expired row is dropped and the insert retried, as when the existing
+    row disappears first; record is None if every attempt lost a race.
+    A placeholder whose lease ran out (its request died) is taken over.
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    lease_start = now - timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS)
+    for _ in range(CLAIM_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(
+                    user=user, key=key, fingerprint=fingerprint, claimed_at=now, expires_at=expires_at,
+                ), True
+        except IntegrityError:
+            record = IdempotencyKey.objects.filter(user=user, key=key).first()
+            if record is None:
+                continue  # deleted in between
+            if record.expires_at <= now:
+                IdempotencyKey.objects.filter(pk=record.pk, expires_at__lte=now).delete()
+                continue
+            if (
+                record.status_code is None
+                and record.claimed_at <= lease_start
+                and record.fingerprint == fingerprint
+                and _take_over(record, now)
+            ):
+                return record, True
+            return record, False
+    return None, False
+
+
+def _release(record):
+    """
+    Drop the placeholder so the request can be retried, unless another
+    attempt has taken the key over.
+    """
+    IdempotencyKey.objects.filter(pk=record.pk, claimed_at=record.claimed_at).delete()
+
+
+def idempotent(view_method):
+    """
+    Make an authenticated APIView handler honour the Idempotency-Key header.
+
+    The first request with a key runs the handler and stores its response;
+    retries with the same key and body get that response back without the
+    handler running again. Server errors are not stored, so they can be retried.
+    A request that never finishes (its worker was killed) holds the key for
+    IDEMPOTENCY_LEASE_SECONDS; the next retry after that runs the handler again.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return view_method(self, request, *args, **kwargs)
+
+        key = key.strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return _error(
+                f"{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters.",
+                status.HTTP_400_BAD_REQUEST,
+            )
+
+        fingerprint = request_fingerprint(request)
+        record, created = _claim(request.user, key, fingerprint)
+
+        if not created:
+            if record is not None and record.fingerprint != fingerprint:
+                return _error(
+                    f"{IDEMPOTENCY_HEADER} was already used for a different request.",
+                    status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            if record is None or record.status_code is None:
+                response = _error(
+                    "A request with this Idempotency-Key is still being processed.",
+                    status.HTTP_409_CONFLICT,
+                )
+                response["Retry-After"] = "1"
+                return response
+            return _replay(record)
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except BaseException:
+            _release(record)
+            raise
+
+        if response.status_code >= 500 or not hasattr(response, "data"):
+            _release(record)
+        else:
+            # Round-trip through the API encoder so the row holds plain JSON
+            IdempotencyKey.objects.filter(pk=record.pk, claimed_at=record.claimed_at).update(
+                status_code=response.status_code,
+                response_body=json.loads(json.dumps(response.data, cls=JSONEncoder)),
+            )
+        return response
+
+    return wrapper
+
+
+def purge_expired_idempotency_keys(*, batch_size: int = 1000) -> int:
+    """
+    Delete expired idempotency keys in batches of `batch_size`, one short
+    statement each, so the purge never holds a long lock on the table.
+    Returns the total deleted.
+    """
+    now = timezone.now()
+    total = 0
+    while True:
+        pks = list(
+            IdempotencyKey.objects.filter(expires_at__lte=now)
+            .order_by("expires_at")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not pks:
+            return total
+        total += IdempotencyKey.objects.filter(pk__in=pks).delete()[0]
+        if len(pks) < batch_size:
+            return total
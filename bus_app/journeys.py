@@ -0,0 +1,199 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .cache_versions import bump_versions, get_version
+from .models import Trip
+
+# Bumped whenever a Trip or Route changes. Processes sharing the cache
+# rebuild on their next plan; with a per-process cache the others only
+# notice once their copy of the key expires (CACHE_VERSION_TTL)
+JOURNEY_INDEX_VERSION_KEY = "bus_app:journey_index_version"
+# Rebuild at least this often so departed trips drop out of memory
+JOURNEY_INDEX_MAX_AGE = 15 * 60
+
+DEFAULT_MIN_TRANSFER_MINUTES = 30
+DEFAULT_MIN_TRANSFER = timedelta(minutes=DEFAULT_MIN_TRANSFER_MINUTES)
+DEFAULT_MAX_LEGS = 4
+MAX_LEGS_LIMIT = 6
+
+INFINITY = float("inf")
+
+
+# -------------------------------
+# ADJACENCY INDEX
+# -------------------------------
+@dataclass(frozen=True, slots=True)
+class Leg:
+    trip_id: int
+    origin_id: int
+    destination_id: int
+    departure: float  # epoch seconds
+    arrival: float
+    price: object
+
+
+class Edge:
+    """
+    All upcoming trips between one pair of cities, sorted by departure.
+
+    `_best[i]` is the leg with the earliest arrival among legs[i:], so
+    "first arrival when leaving at or after t" is one binary search.
+    """
+
+    __slots__ = ("destination_id", "legs", "_departures", "_best")
+
+    def __init__(self, destination_id, legs):
+        self.destination_id = destination_id
+        self.legs = sorted(legs, key=lambda leg: leg.departure)
+        self._departures = [leg.departure for leg in self.legs]
+
+        self._best = [None] * len(self.legs)
+        best = None
+        for position in reversed(range(len(self.legs))):
+            leg = self.legs[position]
+            if best is None or leg.arrival < best.arrival:
+                best = leg
+            self._best[position] = best
+
+    def first_arrival(self, not_before):
+        position = bisect_left(self._departures, not_before)
+        if position == len(self.legs):
+            return None
+        return self._best[position]
+
+
+class JourneyIndex:
+    """
+    Time-expanded graph of upcoming trips: city id -> outgoing Edges.
+    """
+
+    def __init__(self, legs):
+        grouped = defaultdict(list)
+        for leg in legs:
+            grouped[leg.origin_id, leg.destination_id].append(leg)
+
+        self.edges = defaultdict(list)
+        for (origin_id, destination_id), edge_legs in grouped.items():
+            self.edges[origin_id].append(Edge(destination_id, edge_legs))
+        self.size = sum(len(edge_legs) for edge_legs in grouped.values())
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def build(cls, now=None):
+        rows = (
+            Trip.objects.upcoming(now)
+            .exclude(status="cancelled")
+            .filter(route__origin__isnull=False, route__destination__isnull=False)
+            .order_by()
+            .values_list(
+                "pk",
+                "route__origin_id",
+                "route__destination_id",
+                "departure_time",
+                "arrival_time",
+                "price",
+            )
+        )
+        return cls(
+            Leg(pk, origin_id, destination_id, departure.timestamp(), arrival.timestamp(), price)
+            for pk, origin_id, destination_id, departure, arrival, price in rows
+        )
+
+    def plan(self, origin_id, destination_id, *, depart_after, min_transfer=DEFAULT_MIN_TRANSFER,
+             max_legs=DEFAULT_MAX_LEGS):
+        """
+        Earliest-arrival journeys from origin to destination, one per number
+        of legs that improves on the arrival time (fewest legs first).
+
+        Round k extends only the cities whose arrival improved in round k-1
+        (RAPTOR-style), so each query touches the edges reachable in time.
+        """
+        if origin_id == destination_id:
+            return []
+
+        start = depart_after.timestamp()
+        transfer = min_transfer.total_seconds()
+
+        best = {origin_id: start}  # city -> earliest arrival in any round
+        reached = {origin_id: (start, None)}  # previous round: city -> (arrival, path)
+        journeys = []
+
+        for _ in range(max_legs):
+            improved = {}
+            for city_id, (arrival, path) in reached.items():
+                ready = arrival if path is None else arrival + transfer
+                if ready >= best.get(destination_id, INFINITY):
+                    continue
+                for edge in self.edges.get(city_id, ()):
+                    leg = edge.first_arrival(ready)
+                    if leg is None:
+                        continue
+                    target = edge.destination_id
+                    # Must beat both the target and the destination so far
+                    limit = min(best.get(target, INFINITY), best.get(destination_id, INFINITY))
+                    if leg.arrival < limit:
+                        best[target] = leg.arrival
+                        improved[target] = (leg.arrival, (path or ()) + (leg,))
+
+            if destination_id in improved:
+                journeys.append(list(improved[destination_id][1]))
+            if not improved:
+                break
+            reached = improved
+
+        return journeys
+
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def get_journey_index():
+    """
+    Per-process JourneyIndex, rebuilt when trips change (cached version key)
+    or when it is older than JOURNEY_INDEX_MAX_AGE.
+    """
+    global _index, _index_version
+
+    version = get_version(JOURNEY_INDEX_VERSION_KEY)
+
+    def stale():
+        return (
+            _index is None
+            or _index_version != version
+            or time.monotonic() - _index.built_at > JOURNEY_INDEX_MAX_AGE
+        )
+
+    if stale():
+        with _index_lock:
+            if stale():
+                _index = JourneyIndex.build()
+                _index_version = version
+    return _index
+
+
+def invalidate_journey_index():
+    bump_versions([JOURNEY_INDEX_VERSION_KEY])
+
+
+def plan_journeys(origin_id, destination_id, *, depart_after=None, min_transfer=DEFAULT_MIN_TRANSFER,
+                  max_legs=DEFAULT_MAX_LEGS):
+    """
+    Journeys as lists of Leg (see JourneyIndex.plan); never before now.
+    """
+    now = timezone.now()
+    depart_after = max(depart_after or now, now)
+    return get_journey_index().plan(
+        origin_id,
+        destination_id,
+        depart_after=depart_after,
+        min_transfer=min_transfer,
+        max_legs=min(max_legs, MAX_LEGS_LIMIT),
+    )
@@ -0,0 +1,105 @@
+"""
+Fixtures shared by the bench_* management commands.
+"""
+import uuid
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.backends.base.creation import TEST_DATABASE_PREFIX
+from django.utils import timezone
+
+from bus_app.models import Booking, Bus, City, Route, Trip
+
+
+# -------------------------------
+# Database guard
+# -------------------------------
+def using_test_database():
+    """
+    True when the default connection points at a test database.
+    """
+    name = str(connection.settings_dict["NAME"])
+    return name.startswith(TEST_DATABASE_PREFIX) or connection.creation.is_in_memory_db(name)
+
+
+def check_bench_database():
+    """
+    Benchmarks write their fixtures to the configured database: refuse
+    to run against anything but a DEBUG or test database.
+    """
+    if not (settings.DEBUG or using_test_database()):
+        raise CommandError("Refusing to run outside DEBUG or a test database.")
+
+
+# -------------------------------
+# Fixture
+# -------------------------------
+@dataclass(frozen=True)
+class BenchFixture:
+    route: Route
+    users: list
+    trips: list
+
+    @property
+    def user(self):
+        return self.users[0]
+
+    @property
+    def trip(self):
+        return self.trips[0]
+
+
+def create_bench_fixture(*, trips=1, users=1, capacity=40, booked_seats=(), staff=False):
+    """
+    A "Bench <tag>" route with `trips` upcoming trips (a bus each) and
+    `users` users. The first user holds `booked_seats` on every trip.
+    """
+    tag = uuid.uuid4().hex[:8]
+    route = Route.objects.create(location_from=f"Bench {tag}", location_to="Bench End")
+    bench_users = [
+        User.objects.create_user(username=f"bench_{tag}_{i}", password=uuid.uuid4().hex, is_staff=staff)
+        for i in range(users)
+    ]
+    now = timezone.now()
+
+    bench_trips = []
+    for i in range(trips):
+        bus = Bus.objects.create(bus_number=f"BENCH-{tag}-{i}", capacity=capacity, type_of_bus="Bench")
+        departure = now + timedelta(days=1, minutes=i)
+        bench_trips.append(Trip.objects.create(
+            bus=bus,
+            route=route,
+            departure_time=departure,
+            arrival_time=departure + timedelta(hours=5),
+            price=1000 + i,
+        ))
+
+    if booked_seats:
+        Booking.objects.bulk_create(
+            Booking(user=bench_users[0], trip=trip, seat_number=seat, is_confirmed=True, payment_status="paid")
+            for trip in bench_trips
+            for seat in booked_seats
+        )
+        Trip.objects.filter(route=route).update(seats_taken=len(booked_seats))
+
+    return BenchFixture(route=route, users=bench_users, trips=bench_trips)
+
+
+def delete_bench_fixture(fixture):
+    """
+    Remove a fixture, its buses and the cities only its route used.
+    """
+    route = fixture.route
+    buses = list(Bus.objects.filter(trips__route=route).values_list("pk", flat=True))
+    User.objects.filter(pk__in=[user.pk for user in fixture.users]).delete()
+    route.delete()
+    Bus.objects.filter(pk__in=buses).delete()
+    City.objects.filter(
+        pk__in=[route.origin_id, route.destination_id],
+        departing_routes=None,
+        arriving_routes=None,
+    ).delete()
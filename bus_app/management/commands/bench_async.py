@@ -0,0 +1,131 @@
+import asyncio
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from bus_app.management.bench import check_bench_database, create_bench_fixture, delete_bench_fixture
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire bursts of concurrent requests at the sync (WSGI) and async (ASGI) "
+        "trip and booking endpoints, in process, and compare throughput and latency "
+        "(and check both return the same JSON)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Requests per burst")
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=8,
+            help="WSGI worker threads (e.g. gunicorn --threads)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=100,
+            help="Requests in flight at once on the ASGI event loop",
+        )
+        parser.add_argument("--trips", type=int, default=50, help="Trips (and bookings) to create")
+        parser.add_argument("--keep", action="store_true", help="Keep the benchmark data")
+
+    # -------------------------------
+    # Bursts
+    # -------------------------------
+    def wsgi_burst(self, url, headers, count, threads):
+        """
+        `count` requests arriving at once, served by `threads` threads.
+        Returns (wall time, per-request latencies).
+        """
+        started = time.perf_counter()
+
+        def call(_):
+            # A client per request: test clients keep per-client state
+            response = Client().get(url, headers=headers)
+            if response.status_code != 200:
+                raise CommandError(f"GET {url} returned {response.status_code}")
+            return time.perf_counter() - started
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            latencies = list(pool.map(call, range(count)))
+        return time.perf_counter() - started, latencies
+
+    async def asgi_burst(self, url, headers, count, concurrency):
+        slots = asyncio.Semaphore(concurrency)
+        started = time.perf_counter()
+
+        async def call():
+            async with slots:
+                response = await AsyncClient().get(url, headers=headers)
+            if response.status_code != 200:
+                raise CommandError(f"GET {url} returned {response.status_code}")
+            return time.perf_counter() - started
+
+        latencies = await asyncio.gather(*(call() for _ in range(count)))
+        return time.perf_counter() - started, latencies
+
+    def same_json(self, sync_url, async_url, headers):
+        sync_data = Client().get(sync_url, headers=headers).json()
+        async_data = asyncio.run(AsyncClient().get(async_url, headers=headers)).json()
+        # Pagination links name their own endpoint, so compare the results only
+        if isinstance(sync_data, dict) and "results" in sync_data:
+            sync_data, async_data = sync_data["results"], async_data.get("results")
+        return json.dumps(sync_data, sort_keys=True) == json.dumps(async_data, sort_keys=True)
+
+    # -------------------------------
+    # Run
+    # -------------------------------
+    def handle(self, *args, **options):
+        if min(options["requests"], options["threads"], options["concurrency"], options["trips"]) <= 0:
+            raise CommandError("--requests, --threads, --concurrency and --trips must be positive")
+        check_bench_database()
+
+        fixture = create_bench_fixture(trips=options["trips"], booked_seats=(1,), staff=True)
+        try:
+            # Test clients always send "Host: testserver"
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+                self.run_benchmark(fixture.user, fixture.trips, options)
+        finally:
+            if not options["keep"]:
+                delete_bench_fixture(fixture)
+
+    def run_benchmark(self, user, trips, options):
+        headers = {"Authorization": f"Bearer {RefreshToken.for_user(user).access_token}"}
+        ids = ",".join(str(trip.pk) for trip in trips[:25])
+        endpoints = [
+            ("trip detail", f"?trip_id={trips[0].pk}", "api-trips", "api-async-trips"),
+            ("trips ?ids=", f"?ids={ids}", "api-trips", "api-async-trips"),
+            ("bookings", "?page_size=10", "api-my-bookings", "api-async-my-bookings"),
+        ]
+
+        self.stdout.write(
+            f"{'endpoint':<12} {'path':<5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8}  same JSON"
+        )
+        for name, query, sync_name, async_name in endpoints:
+            sync_url = reverse(sync_name) + query
+            async_url = reverse(async_name) + query
+            same = self.same_json(sync_url, async_url, headers)
+
+            runs = [
+                ("wsgi", self.wsgi_burst(sync_url, headers, options["requests"], options["threads"])),
+                ("asgi", asyncio.run(self.asgi_burst(
+                    async_url, headers, options["requests"], options["concurrency"],
+                ))),
+            ]
+            for path, (wall, latencies) in runs:
+                p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+                line = (
+                    f"{name:<12} {path:<5} {len(latencies) / wall:>8.0f} "
+                    f"{statistics.median(latencies) * 1000:>8.1f} {p95 * 1000:>8.1f}  "
+                    f"{'yes' if same else 'NO'}"
+                )
+                self.stdout.write(line if same else self.style.ERROR(line))
@@ -0,0 +1,237 @@
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from bus_app.management.bench import check_bench_database, create_bench_fixture, delete_bench_fixture
+from bus_app.models import Booking, Trip
+from bus_app.services import claim_seat
+
+
+@dataclass(frozen=True)
+class ContentionResult:
+    attempts: int
+    elapsed: float
+    p50: float
+    p95: float
+    p99: float
+    outcomes: dict
+    double_booked: int
+    seats_taken: int
+    bookings: int
+
+    @property
+    def throughput(self):
+        return self.attempts / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def conflict_rate(self):
+        if not self.attempts:
+            return None
+        return (self.attempts - self.outcomes.get("claimed", 0)) / self.attempts
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer one trip with concurrent seat bookings and report throughput, "
+        "latency percentiles, conflict rate and double-booked seats"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16, help="Concurrent workers")
+        parser.add_argument("--attempts", type=int, default=25, help="Booking attempts per worker")
+        parser.add_argument("--capacity", type=int, default=40, help="Seats on the benchmark bus")
+        parser.add_argument(
+            "--hot-seats",
+            type=int,
+            default=0,
+            help="Only target the first N seats (0 = any seat) to force conflicts",
+        )
+        parser.add_argument(
+            "--strategy",
+            choices=["claim", "full_clean"],
+            default="claim",
+            help="claim: services.claim_seat; full_clean: validate-then-insert (old path)",
+        )
+        parser.add_argument(
+            "--target",
+            choices=["service", "page"],
+            default="service",
+            help="Call the service directly or POST to the booking page",
+        )
+        parser.add_argument("--keep", action="store_true", help="Keep the benchmark data")
+
+    # -------------------------------
+    # Booking strategies
+    # -------------------------------
+    def book_claim(self, user, trip, seat_number):
+        return claim_seat(user=user, trip=trip, seat_number=seat_number).status.value
+
+    def book_full_clean(self, user, trip, seat_number):
+        try:
+            with transaction.atomic():
+                booking = Booking(
+                    user=user,
+                    trip=trip,
+                    seat_number=seat_number,
+                    is_confirmed=True,
+                    payment_status="paid",
+                )
+                booking.save()  # runs full_clean()
+        except ValidationError:
+            return "rejected"
+        except IntegrityError:
+            return "integrity_error"
+        return "claimed"
+
+    def book_page(self, client, trip, seat_number):
+        response = client.post(reverse("booking-page", args=[trip.pk]), {"seat_number": seat_number})
+        if response.status_code == 302 and "/payment/" in response.url:
+            return "claimed"
+        return "rejected" if response.status_code == 302 else f"http_{response.status_code}"
+
+    # -------------------------------
+    # Run
+    # -------------------------------
+    def worker(self, user, client, trip, options, barrier, latencies, outcomes, lock):
+        seats = options["hot_seats"] or options["capacity"]
+        local_latencies, local_outcomes = [], Counter()
+        barrier.wait()
+
+        try:
+            for _ in range(options["attempts"]):
+                seat_number = random.randint(1, seats)
+                started = time.perf_counter()
+                try:
+                    if client is not None:
+                        outcome = self.book_page(client, trip, seat_number)
+                    elif options["strategy"] == "claim":
+                        outcome = self.book_claim(user, trip, seat_number)
+                    else:
+                        outcome = self.book_full_clean(user, trip, seat_number)
+                except Exception as e:  # noqa
+                    outcome = f"error:{type(e).__name__}"
+                local_latencies.append(time.perf_counter() - started)
+                local_outcomes[outcome] += 1
+        finally:
+            connection.close()
+
+        with lock:
+            latencies.extend(local_latencies)
+            outcomes.update(local_outcomes)
+
+    def handle(self, *args, **options):
+        check_bench_database()
+
+        threads = options["threads"]
+        fixture = create_bench_fixture(users=threads, capacity=options["capacity"])
+        trip = fixture.trip
+
+        label = "booking_page" if options["target"] == "page" else options["strategy"]
+        self.stdout.write(self.style.WARNING(
+            f"Benchmarking '{label}' with {threads} workers x {options['attempts']} attempts "
+            f"on trip {trip.pk} ({options['capacity']} seats, vendor={connection.vendor})..."
+        ))
+
+        try:
+            self.report(self.run(trip, fixture.users, options))
+        finally:
+            if not options["keep"]:
+                delete_bench_fixture(fixture)
+
+    def run(self, trip, users, options):
+        """
+        One worker thread per user against `trip`. Returns a ContentionResult.
+        """
+        # Log in up front: a worker failing before the barrier would hang the run
+        trip = Trip.objects.select_related("bus", "route").get(pk=trip.pk)
+        clients = [None] * len(users)
+        if options["target"] == "page":
+            clients = [Client() for _ in users]
+            for client, user in zip(clients, users):
+                client.force_login(user)
+
+        latencies, outcomes, lock = [], Counter(), threading.Lock()
+        barrier = threading.Barrier(len(users) + 1)
+        pool = [
+            threading.Thread(
+                target=self.worker,
+                args=(user, client, trip, options, barrier, latencies, outcomes, lock),
+            )
+            for user, client in zip(users, clients)
+        ]
+
+        # Test clients always send "Host: testserver"
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            for thread in pool:
+                thread.start()
+
+            barrier.wait()
+            started = time.perf_counter()
+            for thread in pool:
+                thread.join()
+            elapsed = time.perf_counter() - started
+
+        return self.collect(trip, latencies, outcomes, elapsed)
+
+    def collect(self, trip, latencies, outcomes, elapsed):
+        double_booked = (
+            Booking.objects.holding_seats()
+            .filter(trip=trip)
+            .values("seat_number")
+            .annotate(total=Count("pk"))
+            .filter(total__gt=1)
+            .count()
+        )
+        trip.refresh_from_db()
+
+        if len(latencies) >= 2:
+            cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+            p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+        else:
+            p50 = p95 = p99 = latencies[0] if latencies else 0.0
+
+        return ContentionResult(
+            attempts=sum(outcomes.values()),
+            elapsed=elapsed,
+            p50=p50,
+            p95=p95,
+            p99=p99,
+            outcomes=dict(outcomes),
+            double_booked=double_booked,
+            seats_taken=trip.seats_taken,
+            bookings=Booking.objects.unreleased().filter(trip=trip).count(),
+        )
+
+    def report(self, result):
+        self.stdout.write(
+            f"Attempts:       {result.attempts} in {result.elapsed:.2f}s ({result.throughput:.1f} req/s)"
+        )
+        self.stdout.write(
+            f"Latency:        p50={result.p50 * 1000:.1f}ms p95={result.p95 * 1000:.1f}ms "
+            f"p99={result.p99 * 1000:.1f}ms"
+        )
+        self.stdout.write(
+            "Outcomes:       " + ", ".join(f"{name}={count}" for name, count in sorted(result.outcomes.items()))
+        )
+        conflict_rate = result.conflict_rate
+        self.stdout.write(
+            f"Conflict rate:  {conflict_rate:.1%}" if conflict_rate is not None else "Conflict rate:  n/a"
+        )
+        self.stdout.write(f"Seats counter:  {result.seats_taken} (bookings: {result.bookings})")
+
+        if result.double_booked:
+            self.stdout.write(self.style.ERROR(f"Double-booked:  {result.double_booked} seats"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Double-booked:  0 seats"))
@@ -0,0 +1,103 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.utils.encoders import JSONEncoder
+
+from bus_app.fast_serializers import FastBookingSerializer, FastTripSerializer
+from bus_app.management.bench import check_bench_database, create_bench_fixture, delete_bench_fixture
+from bus_app.models import Booking, Trip
+from bus_app.seats import SeatAvailability
+from bus_app.serializers import BookingSerializer, TripSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare TripSerializer/BookingSerializer against the values() fast path "
+        "at several page sizes (and check both render the same JSON)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[10, 25, 50, 100],
+            help="Page sizes to benchmark",
+        )
+        parser.add_argument("--repeat", type=int, default=30, help="Runs per page size and path")
+        parser.add_argument("--keep", action="store_true", help="Keep the benchmark data")
+
+    # -------------------------------
+    # Serializer paths
+    # -------------------------------
+    def trips_drf(self, queryset, size):
+        page = list(queryset[:size])
+        return TripSerializer(page, many=True, context={"availability": SeatAvailability(page)}).data
+
+    def trips_fast(self, queryset, size):
+        serializer = FastTripSerializer()
+        return serializer.serialize(serializer.values(queryset)[:size])
+
+    def bookings_drf(self, queryset, size):
+        page = list(queryset[:size])
+        availability = SeatAvailability(booking.trip for booking in page)
+        return BookingSerializer(page, many=True, context={"availability": availability}).data
+
+    def bookings_fast(self, queryset, size):
+        serializer = FastBookingSerializer()
+        return serializer.serialize(serializer.values(queryset)[:size])
+
+    def timed(self, func, queryset, size, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func(queryset, size)
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
+
+    # -------------------------------
+    # Run
+    # -------------------------------
+    def handle(self, *args, **options):
+        sizes = sorted(set(options["sizes"]))
+        if not sizes or sizes[0] <= 0:
+            raise CommandError("--sizes must be positive")
+        check_bench_database()
+
+        fixture = create_bench_fixture(trips=sizes[-1], booked_seats=(1, 7, 13))
+        try:
+            trips = (
+                Trip.objects.select_related("bus", "route")
+                .filter(route=fixture.route)
+                .order_by("departure_time", "id")
+            )
+            bookings = (
+                Booking.objects.filter(user=fixture.user)
+                .select_related("trip", "trip__bus", "trip__route")
+                .order_by("-created_at", "-id")
+            )
+            suites = [
+                ("trips", trips, self.trips_drf, self.trips_fast),
+                ("bookings", bookings, self.bookings_drf, self.bookings_fast),
+            ]
+
+            self.stdout.write(f"{'serializer':<10} {'size':>5} {'drf ms':>9} {'fast ms':>9} {'speedup':>8}  same JSON")
+            for name, queryset, drf, fast in suites:
+                for size in sizes:
+                    same = self.dump(drf(queryset, size)) == self.dump(fast(queryset, size))
+                    drf_time = self.timed(drf, queryset, size, options["repeat"])
+                    fast_time = self.timed(fast, queryset, size, options["repeat"])
+                    line = (
+                        f"{name:<10} {size:>5} {drf_time * 1000:>9.2f} {fast_time * 1000:>9.2f} "
+                        f"{drf_time / fast_time:>7.1f}x  {'yes' if same else 'NO'}"
+                    )
+                    self.stdout.write(line if same else self.style.ERROR(line))
+        finally:
+            if not options["keep"]:
+                delete_bench_fixture(fixture)
+
+    @staticmethod
+    def dump(data):
+        return json.dumps(data, cls=JSONEncoder)
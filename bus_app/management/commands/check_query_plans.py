@@ -0,0 +1,71 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from bus_app.models import Booking, Trip
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the hot-path queries and verify they use their indexes. "
+        "Plans are only enforced on PostgreSQL; other backends just report."
+    )
+
+    def hot_queries(self):
+        """
+        (label, expected index, queryset) built the same way the views build them.
+        """
+        trip_id = Trip.objects.values_list("pk", flat=True).first() or 1
+        user_id = User.objects.values_list("pk", flat=True).first() or 1
+
+        return [
+            (
+                "TripListAPIView (upcoming trips)",
+                "trip_active_departure_idx",
+                Trip.objects.select_related("bus", "route").upcoming().order_by("departure_time")[:10],
+            ),
+            (
+                "MyBookingsAPIView (booking history)",
+                "booking_user_recent_idx",
+                Booking.objects.filter(user_id=user_id)
+                .select_related("trip", "trip__bus", "trip__route")
+                .order_by("-created_at", "-id")[:10],
+            ),
+            (
+                "Trip.booked_seats (seat availability)",
+                "booking_active_trip_idx",
+                Booking.objects.holding_seats().filter(trip_id=trip_id).values_list("seat_number", flat=True),
+            ),
+        ]
+
+    def explain(self, queryset):
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                # Tiny dev tables make sequential scans look cheaper; this
+                # check is about whether the index *can* serve the query.
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+            return queryset.explain()
+
+    def handle(self, *args, **options):
+        failures = 0
+
+        for label, index_name, queryset in self.hot_queries():
+            plan = self.explain(queryset)
+
+            if index_name in plan:
+                self.stdout.write(self.style.SUCCESS(f"OK    {label} uses {index_name}"))
+            else:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f"FAIL  {label} does not use {index_name}"))
+                self.stdout.write(plan)
+
+        if not failures:
+            return
+
+        message = f"{failures} hot-path queries are not using their indexes."
+        if connection.vendor != "postgresql":
+            # e.g. SQLite ignores covering columns and prefers the unique index
+            self.stdout.write(self.style.WARNING(f"{message} (not enforced on {connection.vendor})"))
+            return
+        raise CommandError(message)
@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+
+from bus_app.services import sweep_expired_holds
+
+
+class Command(BaseCommand):
+    help = "Release expired pending seat holds, once or on a fixed interval"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=settings.HOLD_SWEEP_INTERVAL,
+            help="Seconds between sweeps (default: HOLD_SWEEP_INTERVAL)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.HOLD_SWEEP_BATCH_SIZE,
+            help="Holds released per transaction (default: HOLD_SWEEP_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run a single sweep and exit",
+        )
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+        batch_size = options["batch_size"]
+        if batch_size <= 0:
+            raise CommandError("--batch-size must be positive")
+        if interval < 0:
+            raise CommandError("--interval can't be negative")
+
+        self.stdout.write(self.style.WARNING(
+            "Sweeping expired holds once..." if options["once"]
+            else f"Sweeping expired holds every {interval}s (Ctrl+C to stop)..."
+        ))
+
+        try:
+            while True:
+                close_old_connections()
+                started = time.monotonic()
+
+                released = sweep_expired_holds(batch_size=batch_size)
+
+                self.stdout.write(
+                    f"[{timezone.localtime():%Y-%m-%d %H:%M:%S}] Released {released} expired holds "
+                    f"in {time.monotonic() - started:.2f}s"
+                )
+
+                if options["once"]:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS("\nSweeper stopped."))
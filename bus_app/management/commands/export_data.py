@@ -0,0 +1,66 @@
+import sys
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from bus_app.exports import (
+    BOOKING_EXPORT_FIELDS,
+    DEFAULT_CHUNK_SIZE,
+    EXPORT_FORMATS,
+    TRIP_EXPORT_FIELDS,
+    booking_export_queryset,
+    stream_export,
+    trip_export_queryset,
+)
+from bus_app.utils import parse_date_param
+
+
+class Command(BaseCommand):
+    help = "Stream trips or bookings to NDJSON or CSV without loading them into memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=["trips", "bookings"])
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson", dest="export_format")
+        parser.add_argument("--output", "-o", help="File to write (default: stdout)")
+        parser.add_argument("--date-from", help="First departure date (YYYY-MM-DD)")
+        parser.add_argument("--date-to", help="Last departure date (YYYY-MM-DD)")
+        parser.add_argument("--route", type=int, help="Only trips on this route (trips export)")
+        parser.add_argument("--trip", type=int, help="Only bookings on this trip (bookings export)")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Rows fetched per database round trip",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            date_from = parse_date_param(options["date_from"], "--date-from")
+            date_to = parse_date_param(options["date_to"], "--date-to")
+        except ValidationError as e:
+            raise CommandError(e.messages[0])
+        if options["chunk_size"] <= 0:
+            raise CommandError("--chunk-size must be positive")
+
+        if options["dataset"] == "trips":
+            queryset = trip_export_queryset(date_from=date_from, date_to=date_to, route_id=options["route"])
+            fields = TRIP_EXPORT_FIELDS
+        else:
+            queryset = booking_export_queryset(date_from=date_from, date_to=date_to, trip_id=options["trip"])
+            fields = BOOKING_EXPORT_FIELDS
+
+        lines = stream_export(queryset, fields, options["export_format"], options["chunk_size"])
+
+        output = options["output"]
+        stream = open(output, "w", newline="", encoding="utf-8") if output else sys.stdout
+        rows = -1 if options["export_format"] == "csv" else 0  # CSV header line
+        try:
+            for line in lines:
+                stream.write(line)
+                rows += 1
+        finally:
+            if output:
+                stream.close()
+
+        if output:
+            self.stderr.write(self.style.SUCCESS(f"Exported {rows} {options['dataset']} to {output}."))
@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from bus_app.idempotency import purge_expired_idempotency_keys
+
+
+class Command(BaseCommand):
+    help = "Delete expired Idempotency-Key records in small batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.IDEMPOTENCY_PURGE_BATCH_SIZE,
+            help="Rows deleted per statement (default: IDEMPOTENCY_PURGE_BATCH_SIZE)",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] <= 0:
+            raise CommandError("--batch-size must be positive")
+
+        started = time.monotonic()
+        deleted = purge_expired_idempotency_keys(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} expired idempotency keys in {time.monotonic() - started:.2f}s"
+        ))
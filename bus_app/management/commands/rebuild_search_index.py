@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from bus_app.models import Trip
+from bus_app.search import refresh_search_documents
+
+
+class Command(BaseCommand):
+    help = "Rebuild trip search documents (and tsvectors on PostgreSQL)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--trip",
+            type=int,
+            action="append",
+            dest="trip_ids",
+            help="Only rebuild this trip id (can be repeated)",
+        )
+
+    def handle(self, *args, **options):
+        trips = Trip.objects.all()
+        if options["trip_ids"]:
+            trips = trips.filter(pk__in=options["trip_ids"])
+
+        changed = refresh_search_documents(trips)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Checked {trips.count()} trips, rebuilt {changed} search documents.")
+        )
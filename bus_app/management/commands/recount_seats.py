@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from bus_app.models import Trip
+from bus_app.services import recount_seats_taken
+
+
+class Command(BaseCommand):
+    help = "Recompute Trip.seats_taken from Booking rows (repairs counter drift)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--trip",
+            type=int,
+            action="append",
+            dest="trip_ids",
+            help="Only recount this trip id (can be repeated)",
+        )
+
+    def handle(self, *args, **options):
+        trips = Trip.objects.all()
+        if options["trip_ids"]:
+            trips = trips.filter(pk__in=options["trip_ids"])
+
+        fixed = recount_seats_taken(trips)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Checked {trips.count()} trips, fixed {fixed} counters.")
+        )
@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+
+def populate_seats_taken(apps, schema_editor):
+    Booking = apps.get_model("bus_app", "Booking")
+    Trip = apps.get_model("bus_app", "Trip")
+
+    counts = (
+        Booking.objects.filter(is_cancelled=False)
+        .filter(models.Q(is_confirmed=True) | models.Q(payment_status="pending"))
+        .order_by()
+        .values("trip")
+        .annotate(total=models.Count("pk"))
+        .values_list("trip", "total")
+    )
+    for trip_id, total in counts:
+        Trip.objects.filter(pk=trip_id).update(seats_taken=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bus_app", "0004_booking_unique_active_seat_per_trip"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trip",
+            name="seats_taken",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_seats_taken, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bus_app", "0005_trip_seats_taken"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                condition=models.Q(
+                    ("is_cancelled", False),
+                    ("is_confirmed", False),
+                    ("payment_status", "pending"),
+                ),
+                fields=["hold_expires_at"],
+                name="booking_expired_hold_idx",
+            ),
+        ),
+    ]
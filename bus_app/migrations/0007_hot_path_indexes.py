@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bus_app", "0006_booking_expired_hold_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                condition=models.Q(("is_cancelled", False)),
+                fields=["trip", "payment_status", "hold_expires_at"],
+                include=("seat_number", "is_confirmed"),
+                name="booking_active_trip_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"],
+                name="booking_user_recent_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="trip",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["departure_time"],
+                name="trip_active_departure_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,136 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Common short names, only seeded when the city already has routes
+SEED_ALIASES = {
+    "Rawalpindi": ["Pindi", "RWP"],
+    "Islamabad": ["Isb", "ISL"],
+    "Karachi": ["Khi"],
+    "Lahore": ["Lhr"],
+}
+
+
+def normalize(name):
+    return " ".join(name.split()).casefold()
+
+
+def link_routes_to_cities(apps, schema_editor):
+    City = apps.get_model("bus_app", "City")
+    CityAlias = apps.get_model("bus_app", "CityAlias")
+    Route = apps.get_model("bus_app", "Route")
+
+    cities = {}
+
+    def city_for(name):
+        key = normalize(name)
+        if key not in cities:
+            cities[key], _ = City.objects.get_or_create(
+                normalized_name=key,
+                defaults={"name": " ".join(name.split())},
+            )
+        return cities[key]
+
+    for route in Route.objects.all():
+        route.origin = city_for(route.location_from)
+        route.destination = city_for(route.location_to)
+        route.save(update_fields=["origin", "destination"])
+
+    for city_name, aliases in SEED_ALIASES.items():
+        city = cities.get(normalize(city_name))
+        if city is None:
+            continue
+        for alias in aliases:
+            CityAlias.objects.get_or_create(
+                normalized_name=normalize(alias),
+                defaults={"city": city, "name": alias},
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bus_app", "0007_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="City",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                (
+                    "normalized_name",
+                    models.CharField(editable=False, max_length=100, unique=True),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "City",
+                "verbose_name_plural": "Cities",
+                "ordering": ["name"],
+            },
+        ),
+        migrations.CreateModel(
+            name="CityAlias",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                (
+                    "normalized_name",
+                    models.CharField(editable=False, max_length=100, unique=True),
+                ),
+                (
+                    "city",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="aliases",
+                        to="bus_app.city",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "City Alias",
+                "verbose_name_plural": "City Aliases",
+            },
+        ),
+        migrations.AddField(
+            model_name="route",
+            name="origin",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="departing_routes",
+                to="bus_app.city",
+            ),
+        ),
+        migrations.AddField(
+            model_name="route",
+            name="destination",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="arriving_routes",
+                to="bus_app.city",
+            ),
+        ),
+        migrations.RunPython(link_routes_to_cities, migrations.RunPython.noop),
+    ]
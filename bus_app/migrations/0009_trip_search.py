@@ -0,0 +1,95 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+def populate_search_documents(apps, schema_editor):
+    Trip = apps.get_model("bus_app", "Trip")
+    CityAlias = apps.get_model("bus_app", "CityAlias")
+
+    aliases = {}
+    for city_id, name in CityAlias.objects.values_list("city_id", "name"):
+        aliases.setdefault(city_id, []).append(name)
+
+    trips = []
+    trips_with_cities = Trip.objects.select_related(
+        "bus", "route__origin", "route__destination"
+    )
+    for trip in trips_with_cities:
+        route = trip.route
+        cities = [
+            city for city in (route.origin, route.destination) if city is not None
+        ]
+        parts = [trip.bus.bus_number, route.route_name]
+        parts += [city.name for city in cities]
+        parts += [alias for city in cities for alias in aliases.get(city.pk, [])]
+        trip.search_document = " ".join(" ".join(parts).split()).casefold()
+        trips.append(trip)
+    Trip.objects.bulk_update(trips, ["search_document"], batch_size=500)
+
+
+def populate_search_vectors(apps, schema_editor):
+    # search_vector is only queried on PostgreSQL
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    Trip = apps.get_model("bus_app", "Trip")
+    Trip.objects.update(
+        search_vector=django.contrib.postgres.search.SearchVector(
+            "search_document", config="simple"
+        )
+    )
+
+
+class AddPostgresIndex(migrations.AddIndex):
+    """
+    AddIndex that only touches the database on PostgreSQL; GIN indexes
+    don't exist elsewhere, but the model state keeps them everywhere.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bus_app", "0008_city"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trip",
+            name="search_document",
+            field=models.TextField(default="", editable=False),
+        ),
+        migrations.AddField(
+            model_name="trip",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        TrigramExtension(),
+        migrations.RunPython(populate_search_documents, migrations.RunPython.noop),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+        AddPostgresIndex(
+            model_name="trip",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="trip_search_vector_idx"
+            ),
+        ),
+        AddPostgresIndex(
+            model_name="trip",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_document"],
+                name="trip_search_document_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils import timezone
@@ -24,6 +26,69 @@ class Bus(models.Model):
         verbose_name_plural = "Buses"
 
 
+# -------------------------------
+# City Model
+# -------------------------------
+def normalize_city_name(name):
+    """
+    Canonical lookup key for a city name or alias.
+    """
+    return " ".join(name.split()).casefold()
+
+
+class City(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    normalized_name = models.CharField(max_length=100, unique=True, editable=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def for_name(cls, name):
+        """
+        City matching `name` or one of its aliases, created if unknown.
+        """
+        key = normalize_city_name(name)
+        city = cls.objects.filter(
+            models.Q(normalized_name=key) | models.Q(aliases__normalized_name=key)
+        ).first()
+        if city is None:
+            city, _ = cls.objects.get_or_create(
+                normalized_name=key,
+                defaults={"name": " ".join(name.split())},
+            )
+        return city
+
+    def save(self, *args, **kwargs):
+        self.normalized_name = normalize_city_name(self.name)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        ordering = ["name"]
+        verbose_name = "City"
+        verbose_name_plural = "Cities"
+
+
+class CityAlias(models.Model):
+    city = models.ForeignKey(City, on_delete=models.CASCADE, related_name="aliases")
+    name = models.CharField(max_length=100)
+    normalized_name = models.CharField(max_length=100, unique=True, editable=False)
+
+    def save(self, *args, **kwargs):
+        self.normalized_name = normalize_city_name(self.name)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.name} → {self.city.name}"
+
+    class Meta:
+        verbose_name = "City Alias"
+        verbose_name_plural = "City Aliases"
+
+
 # -------------------------------
 # Route Model
 # -------------------------------
@@ -32,11 +97,29 @@ class Route(models.Model):
     location_to = models.CharField(max_length=100)
     route_name = models.CharField(max_length=150, editable=False)
 
+    # Resolved from location_from / location_to on save
+    origin = models.ForeignKey(
+        City,
+        on_delete=models.PROTECT,
+        related_name="departing_routes",
+        null=True,
+        editable=False,
+    )
+    destination = models.ForeignKey(
+        City,
+        on_delete=models.PROTECT,
+        related_name="arriving_routes",
+        null=True,
+        editable=False,
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
         self.route_name = f"{self.location_from} → {self.location_to}"
+        self.origin = City.for_name(self.location_from)
+        self.destination = City.for_name(self.location_to)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -51,6 +134,15 @@ class Route(models.Model):
 # -------------------------------
 # Trip Model
 # -------------------------------
+class TripQuerySet(models.QuerySet):
+    def upcoming(self, now=None):
+        """
+        Active trips that have not departed yet.
+        Matches the trip_active_departure_idx partial index.
+        """
+        return self.filter(is_active=True, departure_time__gte=now or timezone.now())
+
+
 class Trip(models.Model):
     bus = models.ForeignKey(Bus, on_delete=models.CASCADE, related_name="trips")
     route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name="trips")
@@ -59,6 +151,13 @@ class Trip(models.Model):
     arrival_time = models.DateTimeField()
     price = models.DecimalField(max_digits=8, decimal_places=2)
 
+    # Bookings currently occupying a seat, see Booking.objects.unreleased()
+    seats_taken = models.PositiveIntegerField(default=0, editable=False)
+
+    # Maintained by bus_app.search.refresh_search_documents
+    search_document = models.TextField(default="", editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+
     is_active = models.BooleanField(default=True)
     status = models.CharField(
         max_length=20,
@@ -73,6 +172,8 @@ class Trip(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TripQuerySet.as_manager()
+
     def clean(self):
         if self.arrival_time <= self.departure_time:
             raise ValidationError("Arrival time must be after departure time.")
@@ -81,30 +182,40 @@ class Trip(models.Model):
 
     def save(self, *args, **kwargs):
         self.full_clean()
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            # seats_taken only changes through atomic UPDATEs (see services);
+            # writing back this instance's copy would undo concurrent ones
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "seats_taken"
+            ]
         super().save(*args, **kwargs)
 
+    @property
+    def seats_left(self):
+        return max(self.bus.capacity - self.seats_taken, 0)
+
+    @property
+    def is_full(self):
+        return self.seats_taken >= self.bus.capacity
+
     def booked_seats(self):
         """
         Return all confirmed or pending seats that are not expired.
         """
-        now = timezone.now()
-        bookings = self.bookings.filter(is_cancelled=False).exclude(  # noqa
-            payment_status__in=["refunded", "failed"]
-        ).filter(
-            models.Q(is_confirmed=True) |
-            models.Q(payment_status="pending", hold_expires_at__gt=now)
-        )
+        bookings = self.bookings.holding_seats()  # noqa
         return list(bookings.values_list("seat_number", flat=True))
 
-    def available_seats(self):
+    def available_seats(self, booked=None):
         """
-        Returns available seat numbers (ignores expired holds)
+        Returns a SeatMap of available seats (ignores expired holds)
+        Pass `booked` to reuse seat numbers that were already loaded.
         """
-        booked = set(self.booked_seats())
-        return [
-            seat for seat in range(1, self.bus.capacity + 1)
-            if seat not in booked
-        ]
+        from .seats import SeatMap
+
+        if booked is None:
+            booked = self.booked_seats()
+        return SeatMap(self.bus.capacity, booked)
 
     def __str__(self):
         return f"{self.route.route_name} | {self.departure_time:%Y-%m-%d %H:%M}"
@@ -113,11 +224,51 @@ class Trip(models.Model):
         ordering = ["departure_time"]
         verbose_name = "Trip"
         verbose_name_plural = "Trips"
+        indexes = [
+            # Trip search (TripQuerySet.upcoming)
+            models.Index(
+                fields=["departure_time"],
+                condition=models.Q(is_active=True),
+                name="trip_active_departure_idx",
+            ),
+            # Full-text and trigram search (bus_app.search); PostgreSQL only,
+            # migration 0009 skips them on other databases
+            GinIndex(fields=["search_vector"], name="trip_search_vector_idx"),
+            GinIndex(
+                fields=["search_document"],
+                opclasses=["gin_trgm_ops"],
+                name="trip_search_document_trgm_idx",
+            ),
+        ]
 
 
 # -------------------------------
 # Booking Model
 # -------------------------------
+class BookingQuerySet(models.QuerySet):
+    def holding_seats(self, now=None):
+        """
+        Bookings that currently occupy a seat: confirmed, or pending
+        with a hold that has not expired yet.
+        """
+        now = now or timezone.now()
+        return self.filter(is_cancelled=False).exclude(
+            payment_status__in=["refunded", "failed"]
+        ).filter(
+            models.Q(is_confirmed=True) |
+            models.Q(payment_status="pending", hold_expires_at__gt=now)
+        )
+
+    def unreleased(self):
+        """
+        Bookings counted in Trip.seats_taken: confirmed, or pending holds
+        that have not been released yet (even if already expired).
+        """
+        return self.filter(is_cancelled=False).filter(
+            models.Q(is_confirmed=True) | models.Q(payment_status="pending")
+        )
+
+
 class Booking(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="bookings")
     trip = models.ForeignKey(Trip, on_delete=models.CASCADE, related_name="bookings")
@@ -145,6 +296,8 @@ class Booking(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BookingQuerySet.as_manager()
+
     def clean(self):
         now = timezone.now()
 
@@ -167,16 +320,8 @@ class Booking(models.Model):
             if b.is_confirmed or (b.payment_status == "pending" and b.hold_expires_at and b.hold_expires_at > now):
                 raise ValidationError("This seat is already booked for this trip.")
 
-        # Prevent overbooking
-        active_bookings_count = Booking.objects.filter(
-            trip=self.trip,
-            is_cancelled=False
-        ).filter(
-            models.Q(is_confirmed=True) |
-            models.Q(payment_status="pending", hold_expires_at__gt=now)
-        ).count()
-
-        if not self.is_cancelled and active_bookings_count >= self.trip.bus.capacity:
+        # Prevent overbooking (new bookings only, existing ones are counted)
+        if self.pk is None and not self.is_cancelled and self.trip.is_full:
             raise ValidationError("This trip is fully booked.")
 
     def save(self, *args, **kwargs):
@@ -194,6 +339,91 @@ class Booking(models.Model):
                 name="unique_active_seat_per_trip"
             )
         ]
+        indexes = [
+            # Seat availability (BookingQuerySet.holding_seats per trip)
+            models.Index(
+                fields=["trip", "payment_status", "hold_expires_at"],
+                include=["seat_number", "is_confirmed"],
+                condition=models.Q(is_cancelled=False),
+                name="booking_active_trip_idx",
+            ),
+            # Booking history, newest first
+            models.Index(
+                fields=["user", "-created_at", "-id"],
+                name="booking_user_recent_idx",
+            ),
+            # Hold expiry sweeper (see services.expired_holds)
+            models.Index(
+                fields=["hold_expires_at"],
+                condition=models.Q(
+                    is_cancelled=False,
+                    is_confirmed=False,
+                    payment_status="pending",
+                ),
+                name="booking_expired_hold_idx",
+            ),
+        ]
 
     verbose_name = "Booking"
     verbose_name_plural = "Bookings"
+
+
+# -------------------------------
+# Idempotency Key Model
+# -------------------------------
+class IdempotencyKey(models.Model):
+    """
+    First response to a (user, Idempotency-Key) pair, replayed on retries
+    until `expires_at` (see bus_app.idempotency).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    key = models.CharField(max_length=255)
+    # sha256 of method, path and body, so a key can't be reused for another request
+    fingerprint = models.CharField(max_length=64)
+
+    # Null until the original request has finished
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(null=True)
+    # Start of the attempt holding the key; a retry may take over an
+    # unfinished one after IDEMPOTENCY_LEASE_SECONDS (e.g. a killed worker)
+    claimed_at = models.DateTimeField(default=timezone.now)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.key} | {self.user_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="unique_idempotency_key_per_user"),
+        ]
+        indexes = [
+            # Expiry purge (see idempotency.purge_expired_idempotency_keys)
+            models.Index(fields=["expires_at"], name="idempotency_key_expires_idx"),
+        ]
+
+
+# -------------------------------
+# Rate Limit Counter Model
+# -------------------------------
+class RateLimitCounter(models.Model):
+    """
+    Hits in one fixed window of a sliding-window rate limit
+    (database storage of bus_app.throttling).
+    """
+    key = models.CharField(max_length=200)
+    window = models.BigIntegerField()  # window start, in seconds since the epoch
+    count = models.PositiveIntegerField(default=0)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.key} @ {self.window}: {self.count}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["key", "window"], name="unique_rate_limit_window"),
+        ]
+        indexes = [
+            models.Index(fields=["expires_at"], name="rate_limit_expires_idx"),
+        ]
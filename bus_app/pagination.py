@@ -0,0 +1,236 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+# Query parameter that switches list views to keyset (cursor) pagination
+PAGINATION_QUERY_PARAM = "pagination"
+CURSOR_QUERY_PARAM = "cursor"
+
+
+def wants_cursor_pagination(params):
+    return params.get(PAGINATION_QUERY_PARAM) == "cursor"
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+# -------------------------------
+# CURSOR ENCODING
+# -------------------------------
+def encode_cursor(values, reverse=False):
+    """
+    Opaque cursor holding the sort key of a boundary row.
+    """
+    payload = {"v": [str(value) for value in values], "r": int(reverse)}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, model, fields):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = payload["v"]
+        reverse = bool(payload.get("r"))
+        if len(values) != len(fields):
+            raise InvalidCursor
+        values = [
+            model._meta.get_field(field).to_python(value)
+            for field, value in zip(fields, values)
+        ]
+    except (ValueError, TypeError, KeyError, ValidationError) as e:
+        raise InvalidCursor from e
+    return values, reverse
+
+
+# -------------------------------
+# KEYSET PAGE
+# -------------------------------
+class KeysetPage:
+    def __init__(self, items, next_cursor=None, previous_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _seek(fields, descending, values, backwards):
+    """
+    Row-value comparison "(f1, f2, ..) > (v1, v2, ..)" (or "<") as a Q.
+    """
+    condition = Q()
+    for position in reversed(range(len(fields))):
+        lookup = "lt" if descending[position] != backwards else "gt"
+        step = Q(**{f"{fields[position]}__{lookup}": values[position]})
+        if condition:
+            step |= Q(**{fields[position]: values[position]}) & condition
+        condition = step
+    return condition
+
+
+def keyset_page(queryset, *, ordering, page_size, cursor=None):
+    """
+    One page of `queryset` ordered by `ordering` (e.g. ("departure_time", "id")).
+
+    Instead of COUNT(*) + OFFSET, the page starts right after the sort key
+    in `cursor`, so every page costs the same index range scan. The last
+    ordering field must be unique (normally the primary key).
+    """
+    queryset, backwards = _keyset_queryset(queryset, ordering, cursor)
+    # One extra row tells whether another page exists
+    items = list(queryset[:page_size + 1])
+    return _keyset_result(items, ordering, page_size, cursor, backwards)
+
+
+async def akeyset_page(queryset, *, ordering, page_size, cursor=None):
+    """
+    keyset_page() through the async ORM.
+    """
+    queryset, backwards = _keyset_queryset(queryset, ordering, cursor)
+    items = [item async for item in queryset[:page_size + 1]]
+    return _keyset_result(items, ordering, page_size, cursor, backwards)
+
+
+def _keyset_queryset(queryset, ordering, cursor):
+    fields = [name.lstrip("-") for name in ordering]
+    descending = [name.startswith("-") for name in ordering]
+
+    backwards = False
+    if cursor:
+        values, backwards = decode_cursor(cursor, queryset.model, fields)
+        queryset = queryset.filter(_seek(fields, descending, values, backwards))
+
+    if backwards:
+        queryset = queryset.order_by(*[
+            name[1:] if name.startswith("-") else f"-{name}" for name in ordering
+        ])
+    else:
+        queryset = queryset.order_by(*ordering)
+    return queryset, backwards
+
+
+def _keyset_result(items, ordering, page_size, cursor, backwards):
+    fields = [name.lstrip("-") for name in ordering]
+    has_more = len(items) > page_size
+    items = items[:page_size]
+    if backwards:
+        items.reverse()
+
+    def key(obj):
+        # Model instances, or .values() rows (see bus_app.fast_serializers)
+        if isinstance(obj, dict):
+            return [obj[field] for field in fields]
+        return [getattr(obj, field) for field in fields]
+
+    next_cursor = previous_cursor = None
+    if items:
+        if has_more or backwards:
+            next_cursor = encode_cursor(key(items[-1]))
+        if cursor and (has_more or not backwards):
+            previous_cursor = encode_cursor(key(items[0]), reverse=True)
+
+    return KeysetPage(items, next_cursor, previous_cursor)
+
+
+# -------------------------------
+# DRF PAGINATION
+# -------------------------------
+class KeysetPagination(BasePagination):
+    """
+    Opt-in cursor pagination (?pagination=cursor) keyed on `ordering`.
+    Responses carry next/previous links but no total count.
+    """
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 50
+    ordering = ("departure_time", "id")
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = ordering
+        self.page = None
+        self.request = None
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        try:
+            self.page = keyset_page(
+                queryset,
+                ordering=self.ordering,
+                page_size=self.get_page_size(request),
+                cursor=request.query_params.get(CURSOR_QUERY_PARAM),
+            )
+        except InvalidCursor:
+            raise NotFound("Invalid cursor")
+        return self.page.items
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        try:
+            self.page = await akeyset_page(
+                queryset,
+                ordering=self.ordering,
+                page_size=self.get_page_size(request),
+                cursor=request.query_params.get(CURSOR_QUERY_PARAM),
+            )
+        except InvalidCursor:
+            raise NotFound("Invalid cursor")
+        return self.page.items
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, CURSOR_QUERY_PARAM, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_link(self.page.next_cursor),
+            "previous": self.get_link(self.page.previous_cursor),
+            "results": data,
+        })
+
+
+class AsyncPageNumberMixin:
+    """
+    apaginate_queryset() for PageNumberPagination subclasses, counting and
+    fetching the page through the async ORM.
+    """
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()  # otherwise a sync COUNT(*)
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        self.page.object_list = [item async for item in self.page.object_list]
+        return list(self.page)
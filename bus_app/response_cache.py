@@ -0,0 +1,168 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache_versions import bump_versions, cache_is_shared, get_versions
+from .cities import resolve_city_ids
+from .etags import data_etag
+from .models import Route, normalize_city_name
+
+TAG_VERSION_KEY = "bus_app:tag:{tag}"
+STATS_KEY = "bus_app:response_cache:{namespace}:{counter}"
+
+# Tags used by the trip search cache
+ROUTE_TAG = "route:{route_id}"
+ROUTES_TAG = "routes"  # any Route added, changed or removed
+TRIPS_TAG = "trips"  # any Trip or Bus change
+
+
+def route_tag(route_id):
+    return ROUTE_TAG.format(route_id=route_id)
+
+
+# -------------------------------
+# TAG VERSIONS
+# -------------------------------
+def tag_versions(tags):
+    """
+    Current version of each tag (tags seen for the first time get one).
+    """
+    keys = {TAG_VERSION_KEY.format(tag=tag): tag for tag in tags}
+    return {keys[key]: version for key, version in get_versions(list(keys)).items()}
+
+
+def bump_tags(tags):
+    """
+    Invalidate every cached response tagged with one of `tags`.
+    """
+    bump_versions([TAG_VERSION_KEY.format(tag=tag) for tag in tags])
+
+
+# -------------------------------
+# RESPONSE CACHE
+# -------------------------------
+class ResponseCache:
+    """
+    Cache of response payloads keyed on normalised query parameters.
+
+    Each entry remembers the versions of its tags; bumping a tag (see
+    bump_tags) turns every entry carrying it into a miss, so writes evict
+    only the responses they can affect.
+
+    Workers only see each other's bumps through a shared cache backend. On a
+    per-process cache (the default LocMemCache) each worker has its own
+    entries and tag versions, its tags expire after CACHE_VERSION_TTL, and
+    the hit/miss counters cover that worker alone.
+    """
+
+    # Free-text parameters compared case- and whitespace-insensitively
+    text_params = ()
+
+    def __init__(self, namespace, timeout=None):
+        self.namespace = namespace
+        self.timeout = timeout
+
+    def get_timeout(self):
+        if self.timeout is not None:
+            return self.timeout
+        return getattr(settings, "RESPONSE_CACHE_TTL", 60)
+
+    def normalize_params(self, params):
+        normalized = {}
+        for name in sorted(params):
+            values = [value.strip() for value in params.getlist(name) if value.strip()]
+            if name in self.text_params:
+                values = [normalize_city_name(value) for value in values]
+            if values:
+                normalized[name] = values
+        return normalized
+
+    def make_key(self, request):
+        raw = json.dumps(
+            [request.get_host(), request.path, self.normalize_params(request.query_params)],
+            separators=(",", ":"),
+        )
+        digest = hashlib.sha256(raw.encode()).hexdigest()
+        return f"bus_app:response_cache:{self.namespace}:{digest}"
+
+    def get(self, request, versions):
+        """
+        (data, etag) of a cached response built under the same tag
+        `versions` (see tag_versions), or None.
+        """
+        entry = cache.get(self.make_key(request))
+        if entry is not None and entry["tags"] == versions:
+            self.count("hits")
+            return entry["data"], entry["etag"]
+        self.count("misses")
+        return None
+
+    def set(self, request, versions, data):
+        """
+        Cache `data` and return its ETag. Pass the versions read *before*
+        building `data`, so a write that lands in between leaves the entry
+        already stale.
+        """
+        entry = {"tags": versions, "data": data, "etag": data_etag(data)}
+        cache.set(self.make_key(request), entry, self.get_timeout())
+        return entry["etag"]
+
+    # -------- Hit / miss counters --------
+    def count(self, counter):
+        key = STATS_KEY.format(namespace=self.namespace, counter=counter)
+        if not cache.add(key, 1, None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, 1, None)
+
+    def stats(self):
+        keys = {
+            counter: STATS_KEY.format(namespace=self.namespace, counter=counter)
+            for counter in ("hits", "misses")
+        }
+        values = cache.get_many(keys.values())
+        hits = values.get(keys["hits"], 0)
+        misses = values.get(keys["misses"], 0)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else None,
+            # "process": counted by the worker that served this request only
+            "scope": "shared" if cache_is_shared() else "process",
+        }
+
+    def reset_stats(self):
+        cache.delete_many([
+            STATS_KEY.format(namespace=self.namespace, counter=counter)
+            for counter in ("hits", "misses")
+        ])
+
+
+class TripSearchCache(ResponseCache):
+    text_params = ("from_city", "to_city", "search")
+
+    def tags_for(self, params):
+        """
+        Routes a trip search can return: the routes between the resolved
+        cities when filtered by city, otherwise every trip.
+        """
+        from_city, to_city = params.get("from_city"), params.get("to_city")
+        if not (from_city or to_city):
+            return [TRIPS_TAG]
+
+        routes = Route.objects.all()
+        if from_city:
+            routes = routes.filter(origin_id__in=resolve_city_ids(from_city))
+        if to_city:
+            routes = routes.filter(destination_id__in=resolve_city_ids(to_city))
+        return [ROUTES_TAG, *(route_tag(pk) for pk in routes.values_list("pk", flat=True))]
+
+    def versions_for(self, params):
+        return tag_versions(self.tags_for(params))
+
+
+trip_search_cache = TripSearchCache("trip_search")
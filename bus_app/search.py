@@ -0,0 +1,213 @@
+import math
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Case, F, FloatField, Q, Value, When
+
+from .cache_versions import bump_versions, get_version
+from .models import CityAlias, Trip, normalize_city_name
+
+TOKEN_RE = re.compile(r"\w+")
+SEARCH_INDEX_VERSION_KEY = "bus_app:search_index_version"
+# Search language config; "simple" keeps city names and bus numbers unstemmed
+SEARCH_CONFIG = "simple"
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(normalize_city_name(text or ""))
+
+
+def uses_postgres_search():
+    return connection.vendor == "postgresql"
+
+
+# -------------------------------
+# SEARCH DOCUMENTS
+# -------------------------------
+def build_search_document(bus_number, route_name, cities=(), aliases=()):
+    """
+    Normalised text searched for one trip: bus number, route and the
+    canonical names and aliases of its cities.
+    """
+    parts = [bus_number, route_name, *cities, *aliases]
+    return normalize_city_name(" ".join(part for part in parts if part))
+
+
+def refresh_search_documents(trips=None) -> int:
+    """
+    Rebuild Trip.search_document (and search_vector on PostgreSQL) for
+    `trips` (default: all). Returns the number of trips that changed.
+    """
+    if trips is None:
+        trips = Trip.objects.all()
+
+    rows = trips.order_by().values_list(
+        "pk",
+        "search_document",
+        "bus__bus_number",
+        "route__route_name",
+        "route__origin_id",
+        "route__origin__name",
+        "route__destination_id",
+        "route__destination__name",
+    )
+
+    rows = list(rows)
+    city_ids = {row[4] for row in rows} | {row[6] for row in rows}
+    aliases = defaultdict(list)
+    alias_rows = CityAlias.objects.filter(city_id__in=city_ids).values_list("city_id", "name")
+    for city_id, alias in alias_rows:
+        aliases[city_id].append(alias)
+
+    changed = []
+    for pk, current, bus_number, route_name, origin_id, origin, destination_id, destination in rows:
+        document = build_search_document(
+            bus_number,
+            route_name,
+            cities=(origin, destination),
+            aliases=aliases[origin_id] + aliases[destination_id],
+        )
+        if document != current:
+            changed.append(Trip(pk=pk, search_document=document))
+
+    if changed:
+        Trip.objects.bulk_update(changed, ["search_document"], batch_size=500)
+        if uses_postgres_search():
+            from django.contrib.postgres.search import SearchVector
+
+            Trip.objects.filter(pk__in=[trip.pk for trip in changed]).update(
+                search_vector=SearchVector("search_document", config=SEARCH_CONFIG)
+            )
+        else:
+            transaction.on_commit(invalidate_search_index)
+
+    return len(changed)
+
+
+# -------------------------------
+# IN-MEMORY INVERTED INDEX (non-PostgreSQL fallback)
+# -------------------------------
+class InvertedIndex:
+    """
+    Token -> {document id: term frequency}, with a sorted vocabulary so
+    query terms also match as prefixes ("isl" finds "islamabad").
+    """
+
+    def __init__(self, documents):
+        self.postings = defaultdict(dict)
+        self.size = 0
+        for doc_id, text in documents:
+            self.size += 1
+            for token in tokenize(text):
+                self.postings[token][doc_id] = self.postings[token].get(doc_id, 0) + 1
+        self.vocabulary = sorted(self.postings)
+
+    def _expand(self, term):
+        position = bisect_left(self.vocabulary, term)
+        while position < len(self.vocabulary) and self.vocabulary[position].startswith(term):
+            yield self.vocabulary[position]
+            position += 1
+
+    def search(self, text):
+        """
+        {document id: score} for documents matching every query term.
+        Exact token matches outweigh prefix matches; rarer terms count more.
+        """
+        scores = None
+        for term in tokenize(text):
+            term_scores = defaultdict(float)
+            for token in self._expand(term):
+                postings = self.postings[token]
+                idf = math.log(1 + self.size / len(postings))
+                weight = idf if token == term else idf / 2
+                for doc_id, frequency in postings.items():
+                    term_scores[doc_id] += weight * (1 + math.log(frequency))
+
+            if scores is None:
+                scores = dict(term_scores)
+            else:
+                scores = {
+                    doc_id: score + term_scores[doc_id]
+                    for doc_id, score in scores.items()
+                    if doc_id in term_scores
+                }
+            if not scores:
+                return {}
+        return scores or {}
+
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def get_search_index():
+    """
+    Per-process InvertedIndex over every trip's search document, rebuilt
+    when the cached version key changes.
+    """
+    global _index, _index_version
+
+    version = get_version(SEARCH_INDEX_VERSION_KEY)
+
+    if _index is None or _index_version != version:
+        with _index_lock:
+            if _index is None or _index_version != version:
+                _index = InvertedIndex(
+                    Trip.objects.order_by().values_list("pk", "search_document")
+                )
+                _index_version = version
+    return _index
+
+
+def invalidate_search_index():
+    bump_versions([SEARCH_INDEX_VERSION_KEY])
+
+
+# -------------------------------
+# TRIP SEARCH
+# -------------------------------
+def search_trips(trips_queryset, text):
+    """
+    Trips matching `text`, annotated with `search_rank` and ordered by it
+    (most relevant first).
+
+    PostgreSQL ranks the tsvector match plus trigram similarity, both
+    served by GIN indexes; other databases use the cached InvertedIndex
+    (get_search_index) and keep the matches that are in the queryset.
+    """
+    terms = tokenize(text)
+    if not terms:
+        return trips_queryset
+
+    if uses_postgres_search():
+        from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+
+        query = SearchQuery(
+            " & ".join(f"{term}:*" for term in terms),
+            config=SEARCH_CONFIG,
+            search_type="raw",
+        )
+        phrase = " ".join(terms)
+        trips_queryset = trips_queryset.filter(
+            Q(search_vector=query) | Q(search_document__contains=phrase)
+        ).annotate(
+            search_rank=SearchRank(F("search_vector"), query)
+            + TrigramWordSimilarity(phrase, "search_document")
+        )
+    else:
+        scores = get_search_index().search(text)
+        if not scores:
+            return trips_queryset.none()
+        trips_queryset = trips_queryset.filter(pk__in=scores).annotate(
+            search_rank=Case(
+                *[When(pk=pk, then=Value(score)) for pk, score in scores.items()],
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+        )
+
+    return trips_queryset.order_by("-search_rank", "departure_time", "id")
@@ -0,0 +1,133 @@
+from collections import defaultdict
+
+from .models import Booking
+
+
+# -------------------------------
+# SEAT MAP (BITSET)
+# -------------------------------
+class SeatMap:
+    """
+    Compact seat map for one trip: bit N is set when seat N is booked.
+
+    Membership checks are O(1), "seats left" is a popcount and iterating
+    yields only the free seat numbers, in order.
+    """
+
+    __slots__ = ("capacity", "_booked")
+
+    def __init__(self, capacity, booked=()):
+        self.capacity = capacity
+        mask = 0
+        for seat in booked:
+            mask |= 1 << seat
+        self._booked = mask & self._seats_mask(capacity)
+
+    @classmethod
+    def from_mask(cls, capacity, mask):
+        seat_map = cls(capacity)
+        seat_map._booked = mask & cls._seats_mask(capacity)
+        return seat_map
+
+    @staticmethod
+    def _seats_mask(capacity):
+        # Bits 1..capacity (bit 0 is never used)
+        return (1 << (capacity + 1)) - 2
+
+    def is_booked(self, seat):
+        return 1 <= seat <= self.capacity and bool(self._booked >> seat & 1)
+
+    def is_free(self, seat):
+        return 1 <= seat <= self.capacity and not self._booked >> seat & 1
+
+    @property
+    def booked_count(self):
+        return self._booked.bit_count()
+
+    @property
+    def free_count(self):
+        return self.capacity - self._booked.bit_count()
+
+    def layout(self):
+        """
+        Yield (seat_number, booked) for every seat, for seat-picker pages.
+        """
+        booked = self._booked
+        for seat in range(1, self.capacity + 1):
+            yield seat, bool(booked >> seat & 1)
+
+    def __contains__(self, seat):
+        return self.is_free(seat)
+
+    def __iter__(self):
+        free = ~self._booked & self._seats_mask(self.capacity)
+        while free:
+            lowest = free & -free
+            yield lowest.bit_length() - 1
+            free ^= lowest
+
+    def __len__(self):
+        return self.free_count
+
+    def __bool__(self):
+        return self.free_count > 0
+
+    def __repr__(self):
+        return f"<SeatMap {self.free_count}/{self.capacity} free>"
+
+
+# -------------------------------
+# BATCHED SEAT AVAILABILITY
+# -------------------------------
+class SeatAvailability:
+    """
+    Booked seats for a batch of trips, loaded with a single query.
+
+    Pass an instance to TripSerializer through the "availability" context
+    key so a page of trips doesn't run one booking query per row.
+    Trips should come with `bus` already selected.
+    """
+
+    def __init__(self, trips=(), now=None):
+        # trip id -> bitmask of booked seats (see SeatMap)
+        self._booked = defaultdict(int)
+
+        rows = self._rows(trips, now)
+        if rows is not None:
+            for trip_id, seat_number in rows:
+                self._add(trip_id, seat_number)
+
+    @classmethod
+    async def aload(cls, trips, now=None):
+        """
+        Same batch through the async ORM, for async views.
+        """
+        availability = cls()
+        rows = cls._rows(trips, now)
+        if rows is not None:
+            async for trip_id, seat_number in rows:
+                availability._add(trip_id, seat_number)
+        return availability
+
+    @staticmethod
+    def _rows(trips, now):
+        # Trips or bare trip ids
+        trip_ids = {getattr(trip, "pk", trip) for trip in trips}
+        if not trip_ids:
+            return None
+        return (
+            Booking.objects
+            .holding_seats(now)
+            .filter(trip_id__in=trip_ids)
+            .order_by()
+            .values_list("trip_id", "seat_number")
+        )
+
+    def _add(self, trip_id, seat_number):
+        self._booked[trip_id] |= 1 << seat_number
+
+    def available_seats(self, trip):
+        return self.seat_map(trip.pk, trip.bus.capacity)
+
+    def seat_map(self, trip_id, capacity):
+        return SeatMap.from_mask(capacity, self._booked.get(trip_id, 0))
@@ -4,10 +4,85 @@ from rest_framework import serializers
 from .models import Booking, Trip
 
 
+# ----------------------------
+# SPARSE FIELDSETS (?fields= / ?expand=)
+# ----------------------------
+def parse_field_selection(query_params, default_expand=()):
+    """
+    Serializer context for ?fields=id,trip_detail.price and
+    ?expand=available_seats (comma separated, dotted for nested fields).
+    """
+    def names(param):
+        return {
+            name.strip()
+            for value in query_params.getlist(param)
+            for name in value.split(",")
+            if name.strip()
+        }
+
+    fields = names("fields")
+    return {
+        "fields": fields or None,
+        "expand": names("expand") | set(default_expand),
+    }
+
+
+class FieldSelectionMixin:
+    """
+    Drops fields not listed in context["fields"] (when given) and fields in
+    Meta.expandable_fields that are neither in context["expand"] nor named
+    in context["fields"], so expensive fields are only computed when asked
+    for. Nested serializers use dotted paths ("trip_detail.available_seats").
+
+    Without an "expand" key in the context every field is rendered, as
+    before; views opt in with parse_field_selection().
+    """
+
+    def selection_path(self):
+        names = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                names.append(node.field_name)
+            node = node.parent
+        return "".join(f"{name}." for name in reversed(names))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        only = self.context.get("fields")
+        expand = self.context.get("expand")
+        expandable = getattr(self.Meta, "expandable_fields", ())
+        path = self.selection_path()
+
+        for name in list(fields):
+            dotted = path + name
+            if only is not None and not self.is_selected(dotted, only):
+                del fields[name]
+            elif (
+                expand is not None
+                and name in expandable
+                and dotted not in expand
+                and dotted not in (only or ())
+            ):
+                del fields[name]
+        return fields
+
+    @staticmethod
+    def is_selected(dotted, only):
+        """
+        Selected directly, through a parent ("trip_detail") or because a
+        nested child is selected ("trip_detail.price" keeps trip_detail).
+        """
+        parts = dotted.split(".")
+        if any(".".join(parts[:i]) in only for i in range(1, len(parts) + 1)):
+            return True
+        return any(name.startswith(dotted + ".") for name in only)
+
+
 # ----------------------------
 # TRIP SERIALIZER
 # ----------------------------
-class TripSerializer(serializers.ModelSerializer):
+class TripSerializer(FieldSelectionMixin, serializers.ModelSerializer):
     available_seats = serializers.SerializerMethodField()
     route_name = serializers.CharField(
         source="route.route_name",
@@ -30,15 +105,39 @@ class TripSerializer(serializers.ModelSerializer):
             "available_seats",
             "is_active",
         ]
+        # Seat scan per trip, only computed when expanded
+        expandable_fields = ["available_seats"]
 
     def get_available_seats(self, obj):  # noqa
-        return obj.available_seats()
+        # Views serializing many trips pass a SeatAvailability batch
+        availability = self.context.get("availability")
+        if availability is not None:
+            return list(availability.available_seats(obj))
+        return list(obj.available_seats())
+
+
+# ----------------------------
+# FARE CALENDAR DAY SERIALIZER
+# ----------------------------
+class FareDaySerializer(serializers.Serializer):
+    date = serializers.DateField()
+    min_price = serializers.DecimalField(max_digits=8, decimal_places=2, allow_null=True)
+    seats_left = serializers.IntegerField()
+    trips = serializers.IntegerField()
+
+
+# ----------------------------
+# SEAT SELECTION SERIALIZER
+# ----------------------------
+class SeatSelectionSerializer(serializers.Serializer):
+    # IntegerField rejects 2.7 and True instead of truncating them
+    seats = serializers.ListField(child=serializers.IntegerField())
 
 
 # ----------------------------
 # BOOKING SERIALIZER
 # ----------------------------
-class BookingSerializer(serializers.ModelSerializer):
+class BookingSerializer(FieldSelectionMixin, serializers.ModelSerializer):
     trip_detail = TripSerializer(
         source="trip",
         read_only=True
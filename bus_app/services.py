@@ -1,19 +1,84 @@
-from django.db import transaction
+from collections import Counter
+from dataclasses import dataclass
+from datetime import timedelta
+from enum import Enum
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from .models import Booking, Trip
+from .signals import seats_changed
 
 
 # -------------------------------
-# BOOKING SERVICES
+# SEAT COUNTER
 # -------------------------------
 
+def take_seats(*, trip: Trip, count: int = 1) -> bool:
+    """
+    Atomically add `count` to trip.seats_taken if capacity allows.
+    Returns False (and changes nothing) when the trip would overflow.
+    """
+    updated = Trip.objects.filter(
+        pk=trip.pk,
+        seats_taken__lte=trip.bus.capacity - count,
+    ).update(seats_taken=F("seats_taken") + count)
+    if updated:
+        seats_changed.send(sender=Trip, trip_ids=[trip.pk])
+    return bool(updated)
+
+
+def release_seats(*, trip_id: int, count: int = 1) -> None:
+    """
+    Atomically subtract `count` from a trip's seats_taken.
+    """
+    if count:
+        Trip.objects.filter(pk=trip_id).update(
+            seats_taken=Greatest(F("seats_taken") - count, 0)
+        )
+        seats_changed.send(sender=Trip, trip_ids=[trip_id])
+
+
 @transaction.atomic
-def create_booking(*, user, trip: Trip, seat_number: int) -> Booking:
+def recount_seats_taken(trips=None) -> int:
     """
-    Create a booking safely using DB transaction.
+    Recompute seats_taken from Booking rows for `trips` (default: all).
+    Returns the number of trips whose counter had drifted.
     """
+    if trips is None:
+        trips = Trip.objects.all()
+
+    actual = Coalesce(
+        Subquery(
+            Booking.objects.unreleased()
+            .filter(trip=OuterRef("pk"))
+            .order_by()
+            .values("trip")
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
 
+    drifted = list(
+        trips.annotate(actual=actual)
+        .exclude(seats_taken=F("actual"))
+        .values_list("pk", flat=True)
+    )
+    if drifted:
+        Trip.objects.filter(pk__in=drifted).update(seats_taken=actual)
+        seats_changed.send(sender=Trip, trip_ids=drifted)
+
+    return len(drifted)
+
+
+# -------------------------------
+# BOOKING SERVICES
+# -------------------------------
+
+def _check_bookable(trip: Trip) -> None:
     if not trip.is_active:
         raise ValidationError("This trip is not active.")
 
@@ -23,19 +88,250 @@ def create_booking(*, user, trip: Trip, seat_number: int) -> Booking:
     if trip.departure_time <= timezone.now():
         raise ValidationError("Cannot book a past trip.")
 
-    booking = Booking(
-        user=user,
-        trip=trip,
-        seat_number=seat_number,
-        is_confirmed=True,
+
+# Upper bound for one group booking request
+MAX_SEATS_PER_BOOKING = 10
+
+
+class ClaimStatus(Enum):
+    CLAIMED = "claimed"
+    SEAT_TAKEN = "seat_taken"
+    TRIP_FULL = "trip_full"
+
+
+CLAIM_MESSAGES = {
+    ClaimStatus.CLAIMED: "Seat reserved.",
+    ClaimStatus.SEAT_TAKEN: "This seat is already booked for this trip.",
+    ClaimStatus.TRIP_FULL: "This trip is fully booked.",
+}
+
+
+@dataclass(frozen=True)
+class SeatClaim:
+    """
+    Outcome of claim_seats(). `bookings` is filled only when every seat was
+    claimed; `taken_seats` lists the seats that made a claim fail.
+    """
+    status: ClaimStatus
+    bookings: tuple = ()
+    taken_seats: tuple = ()
+
+    @property
+    def ok(self) -> bool:
+        return self.status is ClaimStatus.CLAIMED
+
+    @property
+    def booking(self) -> Booking | None:
+        return self.bookings[0] if self.bookings else None
+
+    @property
+    def message(self) -> str:
+        if self.status is ClaimStatus.SEAT_TAKEN and len(self.taken_seats) > 1:
+            seats = ", ".join(str(seat) for seat in self.taken_seats)
+            return f"Seats {seats} are already booked for this trip."
+        return CLAIM_MESSAGES[self.status]
+
+
+def _is_expired_hold(holder: dict, now) -> bool:
+    return (
+        not holder["is_confirmed"]
+        and holder["payment_status"] == "pending"
+        and holder["hold_expires_at"] is not None
+        and holder["hold_expires_at"] < now  # as expired_holds()
+    )
+
+
+def claim_seats(*, user, trip: Trip, seat_numbers, hold_minutes: int | None = None) -> SeatClaim:
+    """
+    Claim one or more seats in a short row-locked transaction, all or nothing.
+
+    The conditional seats_taken UPDATE both checks capacity and locks the
+    trip row, so claims for the same trip are serialised without running
+    Booking.full_clean(). All seats are checked against one snapshot of
+    their current holders and inserted with a single bulk write. Busy seats
+    come back as ClaimStatus.SEAT_TAKEN instead of an exception. With
+    `hold_minutes` the bookings are pending holds, otherwise they are
+    created as paid and confirmed.
+    """
+
+    _check_bookable(trip)
+
+    seat_numbers = list(seat_numbers)
+    if not seat_numbers:
+        raise ValidationError("At least one seat is required.")
+    if len(seat_numbers) > MAX_SEATS_PER_BOOKING:
+        raise ValidationError(f"At most {MAX_SEATS_PER_BOOKING} seats can be booked at once.")
+    if len(set(seat_numbers)) != len(seat_numbers):
+        raise ValidationError("Each seat can only be requested once.")
+    if any(not 1 <= seat <= trip.bus.capacity for seat in seat_numbers):
+        raise ValidationError("Seat number exceeds bus capacity.")
+
+    now = timezone.now()
+    bookings = []
+    for seat_number in seat_numbers:
+        booking = Booking(user=user, trip=trip, seat_number=seat_number, is_cancelled=False)
+        if hold_minutes is None:
+            booking.is_confirmed = True
+            booking.payment_status = "paid"
+        else:
+            booking.is_confirmed = False
+            booking.payment_status = "pending"
+            booking.hold_expires_at = now + timedelta(minutes=hold_minutes)
+        bookings.append(booking)
+
+    try:
+        with transaction.atomic():
+            if not take_seats(trip=trip, count=len(bookings)):
+                return SeatClaim(ClaimStatus.TRIP_FULL)
+
+            # Lock the holders so a payment can't confirm a hold we reclaim
+            holders = list(
+                Booking.objects
+                .select_for_update()
+                .filter(trip=trip, seat_number__in=seat_numbers, is_cancelled=False)
+                .values("pk", "seat_number", "is_confirmed", "payment_status", "hold_expires_at")
+            )
+            taken = sorted(h["seat_number"] for h in holders if not _is_expired_hold(h, now))
+            if taken:
+                transaction.set_rollback(True)
+                return SeatClaim(ClaimStatus.SEAT_TAKEN, taken_seats=tuple(taken))
+
+            if holders:
+                # Expired holds that the sweeper hasn't released yet. The
+                # filter re-checks expiry and the counter only gives back
+                # what was actually deleted here, not by the sweeper.
+                released, _ = expired_holds(now).filter(pk__in=[h["pk"] for h in holders]).delete()
+                release_seats(trip_id=trip.pk, count=released)
+
+            Booking.objects.bulk_create(bookings)
+    except IntegrityError:
+        # A writer that bypassed the trip lock got there first
+        return SeatClaim(ClaimStatus.SEAT_TAKEN)
+
+    return SeatClaim(ClaimStatus.CLAIMED, bookings=tuple(bookings))
+
+
+def claim_seat(*, user, trip: Trip, seat_number: int, hold_minutes: int | None = None) -> SeatClaim:
+    """
+    Claim a single seat, see claim_seats().
+    """
+    return claim_seats(
+        user=user, trip=trip, seat_numbers=[seat_number], hold_minutes=hold_minutes
+    )
+
+
+def _bookings_or_error(claim: SeatClaim) -> list[Booking]:
+    if not claim.ok:
+        raise ValidationError(claim.message)
+    return list(claim.bookings)
+
+
+def create_booking(*, user, trip: Trip, seat_number: int) -> Booking:
+    """
+    Create a confirmed booking, raising ValidationError if the seat is busy.
+    """
+    return _bookings_or_error(
+        claim_seat(user=user, trip=trip, seat_number=seat_number)
+    )[0]
+
+
+def create_bookings(*, user, trip: Trip, seat_numbers) -> list[Booking]:
+    """
+    Book several seats on one trip as a unit (e.g. a family booking).
+    Either every seat is booked or none is.
+    """
+    return _bookings_or_error(
+        claim_seats(user=user, trip=trip, seat_numbers=seat_numbers)
+    )
+
+
+def hold_seat(*, user, trip: Trip, seat_number: int, minutes: int) -> Booking:
+    """
+    Reserve a seat as a pending booking until payment or hold expiry.
+    """
+    return _bookings_or_error(
+        claim_seat(user=user, trip=trip, seat_number=seat_number, hold_minutes=minutes)
+    )[0]
+
+
+@transaction.atomic
+def confirm_payment(*, booking: Booking) -> Booking:
+    """
+    Mark a booking as paid. A pending hold already counts towards
+    seats_taken, so the counter is unchanged; the conditional update
+    only fails if the booking was cancelled or released meanwhile.
+    Paying a hold that expired but wasn't swept yet takes its seat back,
+    so seat availability (and the caches built on it) changes.
+    """
+
+    updated = Booking.objects.filter(pk=booking.pk, is_cancelled=False).update(
         payment_status="paid",
+        is_confirmed=True,
+        hold_expires_at=None,
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        raise ValidationError("This booking is no longer active.")
+    seats_changed.send(sender=Trip, trip_ids=[booking.trip_id])
+
+    booking.refresh_from_db()
+    return booking
+
+
+def expired_holds(now=None):
+    """
+    Pending holds past their expiry that still occupy a seat.
+    Matches the booking_expired_hold_idx partial index.
+    """
+    return Booking.objects.filter(
         is_cancelled=False,
+        is_confirmed=False,
+        payment_status="pending",
+        hold_expires_at__lt=now or timezone.now(),
     )
 
-    booking.full_clean()
-    booking.save()
 
-    return booking
+@transaction.atomic
+def release_expired_holds(*, batch_size: int = 500, now=None) -> int:
+    """
+    Delete one batch of expired pending holds (oldest first) and give
+    their seats back. Returns the number of released holds.
+    """
+
+    # Lock the holds so a concurrent payment can't confirm a deleted row
+    released = list(
+        expired_holds(now)
+        .select_for_update(skip_locked=True)
+        .order_by("hold_expires_at")
+        .values_list("pk", "trip_id")[:batch_size]
+    )
+    if not released:
+        return 0
+
+    Booking.objects.filter(pk__in=[pk for pk, _ in released]).delete()
+
+    per_trip = Counter(trip_id for _, trip_id in released)
+    for trip_id, total in per_trip.items():
+        release_seats(trip_id=trip_id, count=total)
+
+    return len(released)
+
+
+def sweep_expired_holds(*, batch_size: int = 500) -> int:
+    """
+    Release every hold that had expired when the sweep started, one
+    short transaction per batch. Returns the total released.
+    """
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive.")
+
+    now = timezone.now()
+    total = 0
+    while True:
+        released = release_expired_holds(batch_size=batch_size, now=now)
+        total += released
+        if released < batch_size:
+            return total
 
 
 @transaction.atomic
@@ -59,20 +355,40 @@ def cancel_booking(*, booking: Booking, user) -> Booking:
             "Booking can only be cancelled 24 hours before departure."
         )
 
-    booking.is_cancelled = True
-    booking.is_confirmed = False
-    booking.payment_status = "failed"
-
-    booking.save(update_fields=[
-        "is_cancelled",
-        "is_confirmed",
-        "payment_status",
-        "updated_at",
-    ])
+    if not mark_cancelled(booking=booking):
+        raise ValidationError("Booking is already cancelled.")
 
     return booking
 
 
+def mark_cancelled(*, booking: Booking, refund: bool = False) -> bool:
+    """
+    Cancel `booking` with a conditional UPDATE and give its seat back if it
+    held one. Returns False if it was already cancelled, so of two
+    concurrent cancels only one releases the seat. With `refund` a paid
+    booking becomes "refunded", otherwise the payment is marked "failed".
+    """
+    if refund:
+        payment_status = Case(When(payment_status="paid", then=Value("refunded")), default=F("payment_status"))
+    else:
+        payment_status = Value("failed")
+    changes = {
+        "is_cancelled": True,
+        "is_confirmed": False,
+        "payment_status": payment_status,
+        "updated_at": timezone.now(),
+    }
+
+    active = Booking.objects.filter(pk=booking.pk, is_cancelled=False)
+    if active.unreleased().update(**changes):
+        release_seats(trip_id=booking.trip_id)
+    elif not active.update(**changes):
+        return False
+
+    booking.refresh_from_db(fields=["is_cancelled", "is_confirmed", "payment_status", "updated_at"])
+    return True
+
+
 # -------------------------------
 # TRIP SERVICES
 # -------------------------------
@@ -103,7 +419,8 @@ def cancel_trip(*, trip: Trip) -> Trip:
 
     trip.status = "cancelled"
     trip.is_active = False
-    trip.save(update_fields=["status", "is_active", "updated_at"])
+    trip.seats_taken = 0
+    trip.save(update_fields=["status", "is_active", "seats_taken", "updated_at"])
 
     trip.bookings.update(  # noqa
         is_cancelled=True,
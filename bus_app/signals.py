@@ -0,0 +1,163 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .authentication import invalidate_cached_user
+from .cities import invalidate_city_catalogue, invalidate_city_index
+from .etags import bump_trip_versions
+from .fares import invalidate_fare_calendars
+from .journeys import invalidate_journey_index
+from .models import Bus, City, CityAlias, Route, Trip
+from .response_cache import ROUTES_TAG, TRIPS_TAG, bump_tags, route_tag
+from .search import invalidate_search_index, refresh_search_documents, uses_postgres_search
+
+# Sent by the seat counter services with `trip_ids` whose seats_taken changed
+seats_changed = Signal()
+
+
+# -------------------------------
+# CITY CATALOGUE
+# -------------------------------
+@receiver([post_save, post_delete], sender=Route)
+@receiver([post_save, post_delete], sender=Trip)
+def refresh_city_catalogue(sender, **kwargs):  # noqa
+    # After commit, so a concurrent rebuild can't cache the old rows
+    transaction.on_commit(invalidate_city_catalogue)
+
+
+# -------------------------------
+# CITY INDEX
+# -------------------------------
+@receiver([post_save, post_delete], sender=City)
+@receiver([post_save, post_delete], sender=CityAlias)
+def refresh_city_index(sender, **kwargs):  # noqa
+    transaction.on_commit(invalidate_city_index)
+    transaction.on_commit(invalidate_city_catalogue)
+
+
+# -------------------------------
+# TRIP SEARCH DOCUMENTS
+# -------------------------------
+@receiver(post_save, sender=Trip)
+def refresh_trip_search_document(sender, instance, update_fields=None, **kwargs):  # noqa
+    if update_fields is not None and not {"bus", "route"} & set(update_fields):
+        return
+    refresh_search_documents(Trip.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Trip)
+def drop_trip_search_document(sender, **kwargs):  # noqa
+    # PostgreSQL searches the table itself; elsewhere the cached index does
+    if not uses_postgres_search():
+        transaction.on_commit(invalidate_search_index)
+
+
+@receiver(post_save, sender=Bus)
+def refresh_bus_search_documents(sender, instance, **kwargs):  # noqa
+    refresh_search_documents(instance.trips.all())
+
+
+@receiver(post_save, sender=Route)
+def refresh_route_search_documents(sender, instance, **kwargs):  # noqa
+    refresh_search_documents(instance.trips.all())
+
+
+@receiver(post_save, sender=City)
+def refresh_city_search_documents(sender, instance, **kwargs):  # noqa
+    refresh_search_documents(
+        Trip.objects.filter(Q(route__origin=instance) | Q(route__destination=instance))
+    )
+
+
+@receiver([post_save, post_delete], sender=CityAlias)
+def refresh_alias_search_documents(sender, instance, **kwargs):  # noqa
+    refresh_search_documents(
+        Trip.objects.filter(
+            Q(route__origin_id=instance.city_id) | Q(route__destination_id=instance.city_id)
+        )
+    )
+
+
+# -------------------------------
+# JOURNEY PLANNER INDEX
+# -------------------------------
+@receiver([post_save, post_delete], sender=Route)
+@receiver([post_save, post_delete], sender=Trip)
+def refresh_journey_index(sender, **kwargs):  # noqa
+    # After commit, so a concurrent rebuild can't pick up the old trips
+    transaction.on_commit(invalidate_journey_index)
+
+
+# -------------------------------
+# FARE CALENDAR
+# -------------------------------
+@receiver([post_save, post_delete], sender=Trip)
+def refresh_trip_fare_calendar(sender, instance, **kwargs):  # noqa
+    route_ids = [instance.route_id]
+    transaction.on_commit(lambda: invalidate_fare_calendars(route_ids))
+
+
+@receiver(seats_changed)
+def refresh_seat_caches(sender, trip_ids, **kwargs):  # noqa
+    trip_ids = list(trip_ids)
+
+    def invalidate():
+        bump_trip_versions(trip_ids)
+        route_ids = set(Trip.objects.filter(pk__in=trip_ids).values_list("route_id", flat=True))
+        invalidate_fare_calendars(route_ids)
+        bump_tags([TRIPS_TAG, *(route_tag(route_id) for route_id in route_ids)])
+
+    # Rolled-back claims don't change anything
+    transaction.on_commit(invalidate)
+
+
+# -------------------------------
+# RESPONSE CACHE
+# -------------------------------
+# After commit: a bump before it would let a concurrent request re-cache
+# the old rows under the new tag versions
+@receiver([post_save, post_delete], sender=Trip)
+def evict_trip_responses(sender, instance, **kwargs):  # noqa
+    tags = [TRIPS_TAG, route_tag(instance.route_id)]
+    transaction.on_commit(lambda: bump_tags(tags))
+
+
+@receiver([post_save, post_delete], sender=Route)
+def evict_route_responses(sender, instance, **kwargs):  # noqa
+    tags = [TRIPS_TAG, ROUTES_TAG, route_tag(instance.pk)]
+    transaction.on_commit(lambda: bump_tags(tags))
+
+
+@receiver([post_save, post_delete], sender=Bus)
+def evict_bus_responses(sender, **kwargs):  # noqa
+    transaction.on_commit(lambda: bump_tags([TRIPS_TAG, ROUTES_TAG]))
+
+
+# -------------------------------
+# TRIP ETAGS
+# -------------------------------
+@receiver([post_save, post_delete], sender=Trip)
+def bump_trip_etag(sender, instance, **kwargs):  # noqa
+    trip_id = instance.pk
+    transaction.on_commit(lambda: bump_trip_versions([trip_id]))
+
+
+@receiver(post_save, sender=Bus)
+@receiver(post_save, sender=Route)
+def bump_trips_etags(sender, instance, **kwargs):  # noqa
+    trip_ids = list(instance.trips.values_list("pk", flat=True))
+    transaction.on_commit(lambda: bump_trip_versions(trip_ids))
+
+
+# -------------------------------
+# CACHED JWT USERS
+# -------------------------------
+@receiver([post_save, post_delete], sender=User)
+def evict_cached_user(sender, instance, update_fields=None, **kwargs):  # noqa
+    # Logins only touch last_login, which authentication doesn't read
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_cached_user(user_id))
@@ -0,0 +1,45 @@
+from django.core.checks import run_checks
+from django.test import SimpleTestCase, override_settings
+
+from bus_app.cache_versions import bump_versions, get_version, get_versions, version_timeout
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+SHARED = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"}}
+
+
+@override_settings(CACHES=LOCMEM, CACHE_VERSION_TTL=30)
+class CacheVersionTests(SimpleTestCase):
+    def test_version_is_stable_until_bumped(self):
+        version = get_version("test:version")
+
+        self.assertEqual(get_version("test:version"), version)
+        bump_versions(["test:version"])
+        self.assertNotEqual(get_version("test:version"), version)
+
+    def test_get_versions(self):
+        first = get_version("test:a")
+
+        versions = get_versions(["test:a", "test:b"])
+
+        self.assertEqual(versions["test:a"], first)
+        self.assertEqual(versions["test:b"], get_version("test:b"))
+
+    def test_per_process_cache_expires_versions(self):
+        self.assertEqual(version_timeout(), 30)
+
+    @override_settings(CACHES=SHARED)
+    def test_shared_cache_keeps_versions(self):
+        self.assertIsNone(version_timeout())
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    def check_ids(self):
+        return [message.id for message in run_checks(include_deployment_checks=True)]
+
+    @override_settings(CACHES=LOCMEM)
+    def test_warns_on_per_process_cache(self):
+        self.assertIn("bus_app.W001", self.check_ids())
+
+    @override_settings(CACHES=SHARED)
+    def test_shared_cache(self):
+        self.assertNotIn("bus_app.W001", self.check_ids())
@@ -0,0 +1,55 @@
+from django.core.exceptions import ValidationError
+
+from bus_app.models import Booking, Trip
+from bus_app.services import cancel_booking, claim_seats, mark_cancelled
+
+from .test_claim_seats import ClaimSeatsTestCase
+
+
+class CancelBookingTests(ClaimSeatsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.bookings = list(claim_seats(user=self.user, trip=self.trip, seat_numbers=[1, 2]).bookings)
+
+    def fresh(self, booking):
+        return Booking.objects.select_related("trip").get(pk=booking.pk)
+
+    def test_cancel_releases_seat(self):
+        booking = cancel_booking(booking=self.fresh(self.bookings[0]), user=self.user)
+
+        self.assertTrue(booking.is_cancelled)
+        self.assertEqual(booking.payment_status, "failed")
+        self.assertEqual(self.seats_taken(), 1)
+
+    def test_concurrent_cancels_release_once(self):
+        # Both requests loaded the booking before either cancelled it
+        first, second = self.fresh(self.bookings[0]), self.fresh(self.bookings[0])
+
+        cancel_booking(booking=first, user=self.user)
+        with self.assertRaisesMessage(ValidationError, "already cancelled"):
+            cancel_booking(booking=second, user=self.user)
+
+        self.assertEqual(self.seats_taken(), 1)
+
+    def test_refund_keeps_unpaid_status(self):
+        Booking.objects.filter(pk=self.bookings[1].pk).update(payment_status="pending", is_confirmed=False)
+        paid, pending = self.fresh(self.bookings[0]), self.fresh(self.bookings[1])
+
+        self.assertTrue(mark_cancelled(booking=paid, refund=True))
+        self.assertTrue(mark_cancelled(booking=pending, refund=True))
+
+        self.assertEqual(paid.payment_status, "refunded")
+        self.assertEqual(pending.payment_status, "pending")
+        self.assertEqual(self.seats_taken(), 0)
+
+
+class TripSaveTests(ClaimSeatsTestCase):
+    def test_save_keeps_concurrent_seat_changes(self):
+        stale = Trip.objects.get(pk=self.trip.pk)
+        claim_seats(user=self.user, trip=self.trip, seat_numbers=[1, 2])
+
+        stale.price = 1500
+        stale.save()
+
+        self.assertEqual(self.seats_taken(), 2)
+        self.assertEqual(Trip.objects.get(pk=self.trip.pk).price, 1500)
@@ -0,0 +1,148 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from bus_app import services
+from bus_app.models import Booking, Bus, Route, Trip
+from bus_app.services import ClaimStatus, claim_seat, claim_seats, confirm_payment, hold_seat
+
+
+class ClaimSeatsTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="rider", password="pw12345!")
+        self.other = User.objects.create_user(username="other", password="pw12345!")
+        self.trip = self.create_trip(capacity=4)
+
+    def create_trip(self, capacity):
+        route = Route.objects.create(location_from="Karachi", location_to="Lahore")
+        bus = Bus.objects.create(bus_number=f"TEST-{capacity}", capacity=capacity, type_of_bus="AC")
+        departure = timezone.now() + timedelta(days=2)
+        return Trip.objects.create(
+            bus=bus,
+            route=route,
+            departure_time=departure,
+            arrival_time=departure + timedelta(hours=5),
+            price=1000,
+        )
+
+    def expire(self, booking):
+        Booking.objects.filter(pk=booking.pk).update(
+            hold_expires_at=timezone.now() - timedelta(minutes=1)
+        )
+
+    def seats_taken(self):
+        self.trip.refresh_from_db()
+        return self.trip.seats_taken
+
+
+class SeatCounterTests(ClaimSeatsTestCase):
+    def test_claim_adds_to_counter(self):
+        claim = claim_seats(user=self.user, trip=self.trip, seat_numbers=[1, 2])
+
+        self.assertIs(claim.status, ClaimStatus.CLAIMED)
+        self.assertEqual(len(claim.bookings), 2)
+        self.assertEqual(self.seats_taken(), 2)
+
+    def test_failed_claim_leaves_counter(self):
+        claim_seat(user=self.user, trip=self.trip, seat_number=1)
+
+        claim = claim_seats(user=self.other, trip=self.trip, seat_numbers=[1, 2])
+
+        self.assertIs(claim.status, ClaimStatus.SEAT_TAKEN)
+        self.assertEqual(self.seats_taken(), 1)
+        self.assertFalse(Booking.objects.filter(trip=self.trip, seat_number=2).exists())
+
+
+class ClaimStatusTests(ClaimSeatsTestCase):
+    def test_seat_taken(self):
+        claim_seat(user=self.user, trip=self.trip, seat_number=3)
+
+        claim = claim_seat(user=self.other, trip=self.trip, seat_number=3)
+
+        self.assertIs(claim.status, ClaimStatus.SEAT_TAKEN)
+        self.assertEqual(claim.taken_seats, (3,))
+        self.assertIsNone(claim.booking)
+
+    def test_seat_held_by_live_hold_is_taken(self):
+        hold_seat(user=self.user, trip=self.trip, seat_number=3, minutes=10)
+
+        claim = claim_seat(user=self.other, trip=self.trip, seat_number=3)
+
+        self.assertIs(claim.status, ClaimStatus.SEAT_TAKEN)
+
+    def test_trip_full(self):
+        claim_seats(user=self.user, trip=self.trip, seat_numbers=[1, 2, 3])
+
+        claim = claim_seats(user=self.other, trip=self.trip, seat_numbers=[4, 1])
+
+        # Capacity is checked before the seats themselves
+        self.assertIs(claim.status, ClaimStatus.TRIP_FULL)
+        self.assertEqual(self.seats_taken(), 3)
+
+
+class ExpiredHoldTests(ClaimSeatsTestCase):
+    def test_reclaims_expired_hold(self):
+        hold = hold_seat(user=self.user, trip=self.trip, seat_number=2, minutes=10)
+        self.expire(hold)
+
+        claim = claim_seat(user=self.other, trip=self.trip, seat_number=2)
+
+        self.assertIs(claim.status, ClaimStatus.CLAIMED)
+        self.assertFalse(Booking.objects.filter(pk=hold.pk).exists())
+        self.assertEqual(claim.booking.user, self.other)
+        # The hold's seat was given back before the new one was counted
+        self.assertEqual(self.seats_taken(), 1)
+
+    def test_paid_expired_hold_is_not_reclaimed(self):
+        hold = hold_seat(user=self.user, trip=self.trip, seat_number=2, minutes=10)
+        self.expire(hold)
+        confirm_payment(booking=hold)
+
+        claim = claim_seat(user=self.other, trip=self.trip, seat_number=2)
+
+        self.assertIs(claim.status, ClaimStatus.SEAT_TAKEN)
+        self.assertTrue(Booking.objects.filter(pk=hold.pk, payment_status="paid").exists())
+        self.assertEqual(self.seats_taken(), 1)
+
+    def test_hold_paid_while_being_reclaimed(self):
+        hold = hold_seat(user=self.user, trip=self.trip, seat_number=2, minutes=10)
+        self.expire(hold)
+        is_expired_hold = services._is_expired_hold
+
+        def pay_after_read(holder, now):
+            # The claim has read the hold as expired; the payment lands now
+            Booking.objects.filter(pk=holder["pk"]).update(
+                payment_status="paid", is_confirmed=True, hold_expires_at=None,
+            )
+            return is_expired_hold(holder, now)
+
+        with mock.patch.object(services, "_is_expired_hold", pay_after_read):
+            claim = claim_seat(user=self.other, trip=self.trip, seat_number=2)
+
+        self.assertIs(claim.status, ClaimStatus.SEAT_TAKEN)
+        # The payment ran inside the claim's transaction and was rolled back
+        # with it; what matters is that the booking was not deleted
+        self.assertTrue(Booking.objects.filter(pk=hold.pk).exists())
+        self.assertEqual(self.seats_taken(), 1)
+
+
+class SweepExpiredHoldsTests(ClaimSeatsTestCase):
+    def test_sweeps_in_batches(self):
+        for seat in (1, 2, 3):
+            self.expire(services.hold_seat(user=self.user, trip=self.trip, seat_number=seat, minutes=10))
+
+        self.assertEqual(services.sweep_expired_holds(batch_size=2), 3)
+        self.assertEqual(self.seats_taken(), 0)
+
+    def test_rejects_non_positive_batch_size(self):
+        with self.assertRaises(ValueError):
+            services.sweep_expired_holds(batch_size=0)
+
+    def test_command_rejects_non_positive_batch_size(self):
+        with self.assertRaisesMessage(CommandError, "--batch-size must be positive"):
+            call_command("expire_holds", "--once", "--batch-size", "0", stdout=StringIO())
@@ -0,0 +1,118 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from bus_app.services import claim_seat, confirm_payment, hold_seat
+
+from .test_claim_seats import ClaimSeatsTestCase
+
+
+class TripETagTests(ClaimSeatsTestCase):
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+        admin = User.objects.create_superuser(username="admin", password="pw12345!")
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+
+    def get_trip(self, etag=None, **params):
+        headers = {"If-None-Match": etag} if etag else {}
+        return self.client.get(
+            reverse("api-trips"), {"trip_id": self.trip.pk, **params}, headers=headers
+        )
+
+    def test_unchanged_trip_returns_304(self):
+        etag = self.get_trip()["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.get_trip(etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertFalse(response.content)
+
+    def test_weak_and_listed_etags_match(self):
+        etag = self.get_trip()["ETag"]
+
+        for header in (f"W/{etag}", f'"other", {etag}', "*"):
+            with self.subTest(header=header):
+                self.assertEqual(
+                    self.get_trip(header).status_code, status.HTTP_304_NOT_MODIFIED
+                )
+
+    def test_stale_etag_returns_body(self):
+        response = self.get_trip('"trip-0-stale"')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["id"], self.trip.pk)
+
+    def test_field_selection_has_own_etag(self):
+        etag = self.get_trip()["ETag"]
+
+        response = self.get_trip(etag, fields="id,price")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_trip_change_changes_etag(self):
+        etag = self.get_trip()["ETag"]
+        self.trip.price = 1200
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.trip.save()
+
+        response = self.get_trip(etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_seat_claim_changes_etag(self):
+        etag = self.get_trip()["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            claim_seat(user=self.user, trip=self.trip, seat_number=1)
+
+        self.assertEqual(self.get_trip(etag).status_code, status.HTTP_200_OK)
+
+    def test_paying_expired_hold_changes_etag(self):
+        hold = hold_seat(user=self.user, trip=self.trip, seat_number=1, minutes=10)
+        self.expire(hold)
+        etag = self.get_trip()["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            confirm_payment(booking=hold)
+
+        self.assertEqual(self.get_trip(etag).status_code, status.HTTP_200_OK)
+
+
+class TripSearchETagTests(ClaimSeatsTestCase):
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+        admin = User.objects.create_superuser(username="admin", password="pw12345!")
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+
+    def search(self, etag=None):
+        headers = {"If-None-Match": etag} if etag else {}
+        return self.client.get(reverse("api-trips"), {"from_city": "Karachi"}, headers=headers)
+
+    def test_cached_search_returns_304(self):
+        etag = self.search()["ETag"]
+
+        response = self.search(etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_write_changes_search_etag(self):
+        etag = self.search()["ETag"]
+        self.trip.price = 1200
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.trip.save()
+
+        response = self.search(etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
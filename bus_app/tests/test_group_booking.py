@@ -0,0 +1,109 @@
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from bus_app import services
+from bus_app.models import Booking
+from bus_app.services import create_bookings, hold_seat
+
+from .test_claim_seats import ClaimSeatsTestCase
+
+
+class CreateBookingsTests(ClaimSeatsTestCase):
+    def test_books_every_seat(self):
+        bookings = create_bookings(user=self.user, trip=self.trip, seat_numbers=[1, 2, 3])
+
+        self.assertEqual(sorted(b.seat_number for b in bookings), [1, 2, 3])
+        self.assertEqual(self.seats_taken(), 3)
+
+    def test_partial_conflict_books_nothing(self):
+        hold_seat(user=self.other, trip=self.trip, seat_number=2, minutes=10)
+
+        with self.assertRaisesMessage(ValidationError, "already booked"):
+            create_bookings(user=self.user, trip=self.trip, seat_numbers=[1, 2, 3])
+
+        self.assertFalse(Booking.objects.filter(user=self.user).exists())
+        self.assertEqual(self.seats_taken(), 1)
+
+    def test_rolls_back_when_insert_fails(self):
+        # A writer that bypassed the trip lock holds seat 3, and the claim's
+        # snapshot misses it, so the conflict only shows up on insert
+        Booking.objects.bulk_create([
+            Booking(user=self.other, trip=self.trip, seat_number=3, is_confirmed=True, payment_status="paid"),
+        ])
+
+        with mock.patch.object(services, "_is_expired_hold", return_value=True):
+            with self.assertRaises(ValidationError):
+                create_bookings(user=self.user, trip=self.trip, seat_numbers=[1, 2, 3])
+
+        self.assertFalse(Booking.objects.filter(user=self.user).exists())
+        self.assertEqual(self.seats_taken(), 0)
+
+    def test_duplicate_seats(self):
+        with self.assertRaisesMessage(ValidationError, "only be requested once"):
+            create_bookings(user=self.user, trip=self.trip, seat_numbers=[1, 2, 1])
+
+        self.assertFalse(Booking.objects.exists())
+        self.assertEqual(self.seats_taken(), 0)
+
+    def test_no_seats(self):
+        with self.assertRaisesMessage(ValidationError, "At least one seat"):
+            create_bookings(user=self.user, trip=self.trip, seat_numbers=[])
+
+
+class GroupBookingAPITests(ClaimSeatsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def book(self, **data):
+        return self.client.post(reverse("api-book"), {"trip": self.trip.pk, **data}, format="json")
+
+    def test_books_seats_list(self):
+        response = self.book(seats=[1, 2])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["booking_ids"]), 2)
+        self.assertEqual(self.seats_taken(), 2)
+
+    def test_partial_conflict(self):
+        hold_seat(user=self.other, trip=self.trip, seat_number=2, minutes=10)
+
+        response = self.book(seats=[1, 2, 3])
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["code"], "seat_taken")
+        self.assertEqual(response.data["taken_seats"], [2])
+        self.assertFalse(Booking.objects.filter(user=self.user).exists())
+        self.assertEqual(self.seats_taken(), 1)
+
+    def test_duplicate_seats(self):
+        response = self.book(seats=[4, 4])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_empty_seats(self):
+        response = self.book(seats=[])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_seats_not_a_list(self):
+        for seats in ["1,2", 3, {"seat": 1}, [1, "two"], [1, 2.7], [True]]:
+            with self.subTest(seats=seats):
+                response = self.book(seats=seats)
+
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(response.data["error"], "seats must be a list of integers")
+
+    def test_seat_number_not_an_integer(self):
+        response = self.book(seat_number=2.7)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(Booking.objects.exists())
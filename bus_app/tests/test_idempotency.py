@@ -0,0 +1,122 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.db import IntegrityError
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from bus_app.idempotency import purge_expired_idempotency_keys
+from bus_app.models import Booking, IdempotencyKey
+
+from .test_claim_seats import ClaimSeatsTestCase
+
+
+class IdempotentBookingTests(ClaimSeatsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def book(self, seat_number, key="booking-1"):
+        return self.client.post(
+            reverse("api-book"),
+            {"trip": self.trip.pk, "seat_number": seat_number},
+            format="json",
+            headers={"Idempotency-Key": key},
+        )
+
+    def test_retry_replays_response(self):
+        first = self.book(1)
+        retry = self.book(1)
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_key_reused_for_other_request(self):
+        self.book(1)
+
+        response = self.book(2)
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_expired_key_runs_again(self):
+        self.book(1)
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        response = self.book(2)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Booking.objects.count(), 2)
+
+    def abandon(self, seconds_ago):
+        """
+        Turn the stored response back into the placeholder of a request
+        whose worker died `seconds_ago` seconds into it.
+        """
+        Booking.objects.all().delete()
+        IdempotencyKey.objects.update(
+            status_code=None,
+            response_body=None,
+            claimed_at=timezone.now() - timedelta(seconds=seconds_ago),
+        )
+
+    @override_settings(IDEMPOTENCY_LEASE_SECONDS=60)
+    def test_unfinished_request_holds_key_during_lease(self):
+        self.book(1)
+        self.abandon(seconds_ago=10)
+
+        response = self.book(1)
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Booking.objects.exists())
+
+    @override_settings(IDEMPOTENCY_LEASE_SECONDS=60)
+    def test_retry_reclaims_abandoned_request(self):
+        self.book(1)
+        self.abandon(seconds_ago=120)
+
+        response = self.book(1)
+        replay = self.book(1)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertEqual(replay["Idempotent-Replayed"], "true")
+        self.assertEqual(replay.data, response.data)
+
+    @override_settings(IDEMPOTENCY_LEASE_SECONDS=60)
+    def test_abandoned_key_is_not_reclaimed_for_other_request(self):
+        self.book(1)
+        self.abandon(seconds_ago=120)
+
+        response = self.book(2)
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_key_that_keeps_changing_hands(self):
+        # Every insert conflicts, but the conflicting row is gone on re-read
+        with mock.patch.object(IdempotencyKey.objects, "create", side_effect=IntegrityError):
+            response = self.book(1)
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertFalse(Booking.objects.exists())
+
+
+class PurgeIdempotencyKeysTests(ClaimSeatsTestCase):
+    def test_purges_expired_keys_only(self):
+        now = timezone.now()
+        IdempotencyKey.objects.bulk_create(
+            IdempotencyKey(user=self.user, key=f"old-{i}", fingerprint="x", expires_at=now - timedelta(minutes=1))
+            for i in range(5)
+        )
+        IdempotencyKey.objects.create(user=self.user, key="live", fingerprint="x", expires_at=now + timedelta(hours=1))
+
+        self.assertEqual(purge_expired_idempotency_keys(batch_size=2), 5)
+        self.assertEqual(list(IdempotencyKey.objects.values_list("key", flat=True)), ["live"])
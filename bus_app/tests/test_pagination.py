@@ -0,0 +1,124 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from bus_app.models import Bus, Route, Trip
+from bus_app.services import hold_seat
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(username="admin", password="pw12345!")
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+        route = Route.objects.create(location_from="Karachi", location_to="Lahore")
+        bus = Bus.objects.create(bus_number="KHI-1", capacity=40, type_of_bus="AC")
+        start = timezone.now() + timedelta(days=1)
+        # The second and third trips share a departure time and prices
+        # repeat, so the id tie-breaker decides their order
+        departures = [0, 1, 1, 2, 3, 4]
+        prices = [1500, 1000, 1500, 1000, 2000, 1000]
+        self.trips = [
+            Trip.objects.create(
+                bus=bus,
+                route=route,
+                departure_time=start + timedelta(hours=hours),
+                arrival_time=start + timedelta(hours=hours + 5),
+                price=price,
+            )
+            for hours, price in zip(departures, prices)
+        ]
+
+    def get(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def walk(self, **params):
+        """
+        Trip ids of every page, following the next links.
+        """
+        params = {"pagination": "cursor", "page_size": 2, **params}
+        page = self.get(reverse("api-trips"), params)
+        self.assertIsNone(page["previous"])
+        pages = []
+        while True:
+            pages.append([trip["id"] for trip in page["results"]])
+            if page["next"] is None:
+                return pages
+            page = self.get(page["next"])
+
+    def test_walks_every_trip_once_in_departure_order(self):
+        pages = self.walk()
+
+        ids = [trip.pk for trip in self.trips]
+        self.assertEqual(pages, [ids[0:2], ids[2:4], ids[4:6]])
+        self.assertNotIn("count", self.get(reverse("api-trips"), {"pagination": "cursor"}))
+
+    def test_descending_sort(self):
+        pages = self.walk(sort="-departure_time")
+
+        ids = [trip.pk for trip in reversed(self.trips)]
+        self.assertEqual(sum(pages, []), ids)
+
+    def test_ties_on_sort_field(self):
+        pages = self.walk(sort="price")
+
+        expected = sorted(self.trips, key=lambda trip: (trip.price, trip.pk))
+        self.assertEqual(sum(pages, []), [trip.pk for trip in expected])
+
+    def test_previous_link_returns_previous_page(self):
+        first = self.get(reverse("api-trips"), {"pagination": "cursor", "page_size": 2})
+        second = self.get(first["next"])
+
+        back = self.get(second["previous"])
+
+        self.assertEqual(back["results"], first["results"])
+        self.assertIsNotNone(back["next"])
+
+    def test_new_rows_do_not_shift_later_pages(self):
+        first = self.get(reverse("api-trips"), {"pagination": "cursor", "page_size": 2})
+        # An earlier trip would move every later row by one with OFFSET paging
+        Trip.objects.create(
+            bus=self.trips[0].bus,
+            route=self.trips[0].route,
+            departure_time=self.trips[0].departure_time - timedelta(minutes=30),
+            arrival_time=self.trips[0].arrival_time,
+            price=900,
+        )
+        cache.clear()
+
+        second = self.get(first["next"])
+
+        self.assertEqual(
+            [trip["id"] for trip in second["results"]],
+            [self.trips[2].pk, self.trips[3].pk],
+        )
+
+    def test_invalid_cursor(self):
+        response = self.client.get(
+            reverse("api-trips"), {"pagination": "cursor", "cursor": "not-a-cursor"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_my_bookings_newest_first(self):
+        bookings = [
+            hold_seat(user=self.admin, trip=self.trips[0], seat_number=seat, minutes=10)
+            for seat in (1, 2, 3)
+        ]
+
+        first = self.get(reverse("api-my-bookings"), {"pagination": "cursor", "page_size": 2})
+        second = self.get(first["next"])
+
+        ids = [booking["id"] for booking in first["results"] + second["results"]]
+        self.assertEqual(ids, [booking.pk for booking in reversed(bookings)])
+        self.assertIsNone(second["next"])
@@ -0,0 +1,108 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bus_app.models import Bus, Route, Trip
+from bus_app.services import claim_seat
+
+
+class TripSearchCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        admin = User.objects.create_superuser(username="admin", password="pw12345!")
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+        self.rider = User.objects.create_user(username="rider", password="pw12345!")
+        self.bus = Bus.objects.create(bus_number="KHI-1", capacity=40, type_of_bus="AC")
+        self.khi_lhr = self.create_trip("Karachi", "Lahore")
+        self.isb_pew = self.create_trip("Islamabad", "Peshawar")
+
+    def create_trip(self, origin, destination):
+        route = Route.objects.create(location_from=origin, location_to=destination)
+        departure = timezone.now() + timedelta(days=2)
+        return Trip.objects.create(
+            bus=self.bus,
+            route=route,
+            departure_time=departure,
+            arrival_time=departure + timedelta(hours=5),
+            price=1000,
+        )
+
+    def search(self, **params):
+        response = self.client.get(reverse("api-trips"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data["results"]
+
+    def stats(self):
+        return self.client.get(reverse("api-cache-stats")).data["trip_search"]
+
+    def test_repeated_search_is_served_from_cache(self):
+        self.search(from_city="Karachi")
+        self.search(from_city="  KARACHI ")
+
+        self.assertEqual(self.stats()["hits"], 1)
+        self.assertEqual(self.stats()["misses"], 1)
+
+    def test_trip_change_evicts_searches_on_its_route(self):
+        self.search(from_city="Karachi")
+        self.khi_lhr.price = 1200
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.khi_lhr.save()
+
+        results = self.search(from_city="Karachi")
+        self.assertEqual(Decimal(results[0]["price"]), 1200)
+        self.assertEqual(self.stats()["hits"], 0)
+
+    def test_trip_change_keeps_searches_on_other_routes(self):
+        self.search(from_city="Islamabad")
+        self.khi_lhr.price = 1200
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.khi_lhr.save()
+
+        self.search(from_city="Islamabad")
+        self.assertEqual(self.stats()["hits"], 1)
+
+    def test_bus_change_evicts_every_search(self):
+        self.search(from_city="Islamabad")
+        self.search()
+        self.bus.type_of_bus = "Sleeper"
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bus.save()
+
+        self.search(from_city="Islamabad")
+        self.search()
+        self.assertEqual(self.stats()["hits"], 0)
+
+    def test_seat_claim_evicts_searches_on_its_route(self):
+        self.search(from_city="Karachi")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            claim_seat(user=self.rider, trip=self.khi_lhr, seat_number=1)
+
+        self.search(from_city="Karachi")
+        self.assertEqual(self.stats()["hits"], 0)
+
+    def test_eviction_waits_for_commit(self):
+        self.search(from_city="Karachi")
+        self.khi_lhr.price = 1200
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.khi_lhr.save()
+            # Still the old row until the write commits
+            self.search(from_city="Karachi")
+            self.assertEqual(self.stats()["hits"], 1)
+
+        for callback in callbacks:
+            callback()
+        results = self.search(from_city="Karachi")
+        self.assertEqual(Decimal(results[0]["price"]), 1200)
+        self.assertEqual(self.stats()["hits"], 1)
@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bus_app.models import Bus, CityAlias, Route, Trip
+from bus_app.search import InvertedIndex
+
+
+class InvertedIndexTests(TestCase):
+    def test_exact_match_outranks_prefix(self):
+        index = InvertedIndex([(1, "lahore express"), (2, "lahorewala coach")])
+
+        scores = index.search("lahore")
+
+        self.assertGreater(scores[1], scores[2])
+
+    def test_every_term_must_match(self):
+        index = InvertedIndex([(1, "karachi lahore"), (2, "karachi multan")])
+
+        self.assertEqual(set(index.search("kar lah")), {1})
+        self.assertEqual(index.search("quetta"), {})
+
+
+class TripSearchAPITests(TestCase):
+    def setUp(self):
+        cache.clear()
+        admin = User.objects.create_superuser(username="admin", password="pw12345!")
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+        self.khi_lhr = self.create_trip("KHI-1", "Karachi", "Lahore", days=2)
+        self.isb_pew = self.create_trip("ISB-1", "Islamabad", "Peshawar", days=1)
+        self.lhr_isb = self.create_trip("LHR-1", "Lahore", "Islamabad", days=3)
+
+    def create_trip(self, bus_number, origin, destination, days):
+        route, _ = Route.objects.get_or_create(location_from=origin, location_to=destination)
+        bus = Bus.objects.create(bus_number=bus_number, capacity=40, type_of_bus="AC")
+        departure = timezone.now() + timedelta(days=days)
+        return Trip.objects.create(
+            bus=bus,
+            route=route,
+            departure_time=departure,
+            arrival_time=departure + timedelta(hours=5),
+            price=1000,
+        )
+
+    def search(self, text, **params):
+        response = self.client.get(reverse("api-trips"), {"search": text, **params})
+        self.assertEqual(response.status_code, 200)
+        return [trip["id"] for trip in response.data["results"]]
+
+    def test_matches_city_prefixes(self):
+        self.assertEqual(
+            set(self.search("isl")), {self.isb_pew.pk, self.lhr_isb.pk}
+        )
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.search("lahore islamabad"), [self.lhr_isb.pk])
+
+    def test_no_match(self):
+        self.assertEqual(self.search("quetta"), [])
+
+    def test_orders_by_relevance_then_departure(self):
+        # "lahore" is an exact token in both; equal ranks fall back to departure
+        self.assertEqual(self.search("lahore"), [self.khi_lhr.pk, self.lhr_isb.pk])
+        # The bus number only matches one trip
+        self.assertEqual(self.search("khi"), [self.khi_lhr.pk])
+
+    def test_sort_overrides_relevance(self):
+        self.assertEqual(
+            self.search("lahore", sort="-departure_time"),
+            [self.lhr_isb.pk, self.khi_lhr.pk],
+        )
+
+    def test_matches_city_aliases(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            CityAlias.objects.create(city=self.isb_pew.route.destination, name="Peshawer")
+
+        self.assertEqual(self.search("peshawer"), [self.isb_pew.pk])
+
+    def test_new_trip_is_searchable(self):
+        self.search("multan")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            trip = self.create_trip("MUL-1", "Lahore", "Multan", days=4)
+
+        self.assertEqual(self.search("multan"), [trip.pk])
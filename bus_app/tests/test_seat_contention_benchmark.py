@@ -0,0 +1,59 @@
+"""
+pytest-benchmark runs of the bench_seat_contention harness:
+
+    pytest bus_app/tests/test_seat_contention_benchmark.py --benchmark-only
+"""
+import pytest
+
+from bus_app.management.bench import create_bench_fixture, delete_bench_fixture
+from bus_app.management.commands.bench_seat_contention import Command
+from bus_app.models import Booking, Trip
+
+THREADS = 8
+ATTEMPTS = 10
+CAPACITY = 20
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def contention():
+    fixture = create_bench_fixture(users=THREADS, capacity=CAPACITY)
+    yield Command(), fixture.trip, fixture.users
+    delete_bench_fixture(fixture)
+
+
+@pytest.mark.parametrize(
+    "strategy, target",
+    [("claim", "service"), ("full_clean", "service"), ("claim", "page")],
+)
+def test_seat_contention(benchmark, contention, strategy, target):
+    command, trip, users = contention
+    options = {
+        "attempts": ATTEMPTS,
+        "capacity": CAPACITY,
+        "hot_seats": 0,
+        "strategy": strategy,
+        "target": target,
+    }
+
+    def reset():
+        Booking.objects.filter(trip=trip).delete()
+        Trip.objects.filter(pk=trip.pk).update(seats_taken=0)
+        return (trip, users, options), {}
+
+    result = benchmark.pedantic(command.run, setup=reset, rounds=3)
+    benchmark.extra_info.update(
+        throughput=result.throughput,
+        p50=result.p50,
+        p95=result.p95,
+        p99=result.p99,
+        conflict_rate=result.conflict_rate,
+        outcomes=result.outcomes,
+    )
+
+    assert result.attempts == THREADS * ATTEMPTS
+    assert result.double_booked == 0
+    assert result.outcomes.get("claimed", 0) <= CAPACITY
+    if strategy == "claim":
+        assert result.seats_taken == result.bookings
@@ -0,0 +1,130 @@
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from bus_app.models import RateLimitCounter
+from bus_app.throttling import DatabaseStorage, LocMemStorage, SlidingWindowThrottle
+
+from .test_claim_seats import ClaimSeatsTestCase
+
+# Start of a one-minute window
+WINDOW = 1_700_000_040
+
+
+class LoginView:
+    throttle_scope = "login"
+    throttle_storage = "cache"
+
+
+@mock.patch.object(SlidingWindowThrottle, "THROTTLE_RATES", {"login": "3/min"})
+class AnonymousThrottleTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+
+    def allowed(self, **headers):
+        request = Request(self.factory.post("/api/login/", **headers))
+        request.user = AnonymousUser()
+        return SlidingWindowThrottle().allow_request(request, LoginView())
+
+    def test_forwarded_for_does_not_reset_window(self):
+        results = [
+            self.allowed(REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR=f"203.0.113.{i}")
+            for i in range(5)
+        ]
+
+        self.assertEqual(results, [True, True, True, False, False])
+
+    @override_settings(REST_FRAMEWORK={"NUM_PROXIES": 1})
+    def test_trusted_proxy_forwards_client_address(self):
+        for _ in range(3):
+            self.assertTrue(self.allowed(REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="203.0.113.1"))
+
+        self.assertFalse(self.allowed(REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="203.0.113.1"))
+        self.assertTrue(self.allowed(REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="203.0.113.2"))
+
+
+@mock.patch.object(SlidingWindowThrottle, "THROTTLE_RATES", {"booking": "3/min"})
+class BookingThrottleTests(ClaimSeatsTestCase):
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def book(self, seat_number, at):
+        with mock.patch.object(SlidingWindowThrottle, "timer", return_value=at):
+            return self.client.post(
+                reverse("api-book"),
+                {"trip": self.trip.pk, "seat_number": seat_number},
+                format="json",
+            )
+
+    def test_rejects_requests_over_the_limit(self):
+        for seat_number in (1, 2, 3):
+            response = self.book(seat_number, WINDOW + 50)
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.book(4, WINDOW + 50)
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # At WINDOW + 80, 2/3 of the previous window still counts: 3 * 2/3 + 1 <= 3
+        self.assertEqual(response["Retry-After"], "30")
+        self.assertEqual(self.seats_taken(), 3)
+        self.assertEqual(self.book(4, WINDOW + 80).status_code, status.HTTP_201_CREATED)
+
+    def test_previous_window_slides_out(self):
+        for seat_number in (1, 2, 3):
+            self.book(seat_number, WINDOW + 50)
+
+        # 10s into the next window, 5/6 of the previous one still counts:
+        # 3 * 5/6 + 1 > 3. A fixed window would have reset here.
+        self.assertEqual(self.book(4, WINDOW + 70).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # 40s in, only a third does: 3 * 1/3 + 1 <= 3
+        self.assertEqual(self.book(4, WINDOW + 100).status_code, status.HTTP_201_CREATED)
+
+    def test_rejected_requests_do_not_count(self):
+        for seat_number in (1, 2, 3):
+            self.book(seat_number, WINDOW + 50)
+        for _ in range(5):
+            self.book(4, WINDOW + 55)
+
+        # Only the 3 accepted requests carry over: 3 * 1/3 + 1 <= 3
+        self.assertEqual(self.book(4, WINDOW + 100).status_code, status.HTTP_201_CREATED)
+
+    def test_limits_each_user_separately(self):
+        for seat_number in (1, 2, 3):
+            self.book(seat_number, WINDOW + 50)
+
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.book(4, WINDOW + 50).status_code, status.HTTP_201_CREATED)
+
+
+class StorageTests(TestCase):
+    def check_storage(self, storage):
+        self.assertEqual(storage.hit("k", WINDOW, 60, WINDOW + 1), (0, 1))
+        self.assertEqual(storage.hit("k", WINDOW, 60, WINDOW + 2), (0, 2))
+        storage.undo("k", WINDOW)
+        self.assertEqual(storage.hit("k", WINDOW + 60, 60, WINDOW + 61), (1, 1))
+        # Windows two durations apart don't carry over
+        self.assertEqual(storage.hit("k", WINDOW + 180, 60, WINDOW + 181), (0, 1))
+
+    def test_locmem_storage(self):
+        self.check_storage(LocMemStorage())
+
+    def test_database_storage(self):
+        self.check_storage(DatabaseStorage())
+
+    def test_database_storage_purges_expired_counters(self):
+        storage = DatabaseStorage()
+        storage.hit("k", WINDOW, 60, WINDOW + 1)
+
+        storage.purge(WINDOW + 120)
+
+        self.assertFalse(RateLimitCounter.objects.exists())
@@ -0,0 +1,218 @@
+import math
+import threading
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from rest_framework.throttling import SimpleRateThrottle
+
+from .models import RateLimitCounter
+
+
+# -------------------------------
+# STORAGE
+# -------------------------------
+# Every storage keeps one counter per (key, fixed window). hit() adds a
+# request to the current window and returns (previous window, current
+# window) counts; undo() takes a rejected request back out.
+class LocMemStorage:
+    """
+    Per-process counters. Expired keys are swept once the number of hits
+    since the last sweep reaches the number of keys, so the sweep stays
+    O(1) amortised per hit.
+    """
+    MIN_SWEEP_INTERVAL = 1024
+
+    def __init__(self):
+        self._counters = {}  # key -> [window, previous, current, expires]
+        self._lock = threading.Lock()
+        self._hits = 0
+
+    def hit(self, key, window, duration, now):
+        with self._lock:
+            self._hits += 1
+            if self._hits >= max(len(self._counters), self.MIN_SWEEP_INTERVAL):
+                self._sweep(now)
+
+            entry = self._counters.get(key)
+            if entry is not None and entry[0] == window:
+                entry[2] += 1
+            else:
+                previous = entry[2] if entry is not None and entry[0] == window - duration else 0
+                entry = self._counters[key] = [window, previous, 1, window + 2 * duration]
+            return entry[1], entry[2]
+
+    def undo(self, key, window):
+        with self._lock:
+            entry = self._counters.get(key)
+            if entry is not None and entry[0] == window and entry[2] > 0:
+                entry[2] -= 1
+
+    def _sweep(self, now):
+        self._counters = {key: entry for key, entry in self._counters.items() if entry[3] > now}
+        self._hits = 0
+
+
+class CacheStorage:
+    """
+    Counters in a Django cache, shared by every process using it.
+    """
+
+    def __init__(self, alias="default"):
+        self.alias = alias
+
+    def hit(self, key, window, duration, now):
+        cache = caches[self.alias]
+        current_key = f"{key}:{window}"
+        cache.add(current_key, 0, 2 * duration)
+        try:
+            current = cache.incr(current_key)
+        except ValueError:  # evicted between add() and incr()
+            cache.set(current_key, 1, 2 * duration)
+            current = 1
+        return cache.get(f"{key}:{window - duration}", 0), current
+
+    def undo(self, key, window):
+        try:
+            caches[self.alias].decr(f"{key}:{window}")
+        except ValueError:
+            pass
+
+
+class DatabaseStorage:
+    """
+    Counters in RateLimitCounter rows. Every PURGE_EVERY hits, one batch of
+    expired rows is deleted.
+    """
+    PURGE_EVERY = 1000
+    PURGE_BATCH_SIZE = 500
+
+    def __init__(self):
+        self._hits = 0
+
+    def hit(self, key, window, duration, now):
+        counters = RateLimitCounter.objects.filter(key=key)
+        if not counters.filter(window=window).update(count=F("count") + 1):
+            try:
+                with transaction.atomic():
+                    RateLimitCounter.objects.create(
+                        key=key,
+                        window=window,
+                        count=1,
+                        expires_at=datetime.fromtimestamp(window + 2 * duration, tz=dt_timezone.utc),
+                    )
+            except IntegrityError:  # created concurrently
+                counters.filter(window=window).update(count=F("count") + 1)
+
+        self._hits += 1
+        if self._hits >= self.PURGE_EVERY:
+            self._hits = 0
+            self.purge(now)
+
+        counts = dict(
+            counters.filter(window__in=[window - duration, window]).values_list("window", "count")
+        )
+        return counts.get(window - duration, 0), counts.get(window, 0)
+
+    def undo(self, key, window):
+        RateLimitCounter.objects.filter(key=key, window=window, count__gt=0).update(count=F("count") - 1)
+
+    def purge(self, now):
+        expired = RateLimitCounter.objects.filter(
+            expires_at__lte=datetime.fromtimestamp(now, tz=dt_timezone.utc)
+        ).values_list("pk", flat=True)[:self.PURGE_BATCH_SIZE]
+        RateLimitCounter.objects.filter(pk__in=list(expired)).delete()
+
+
+_storages = {}
+_storages_lock = threading.Lock()
+
+
+def get_storage(name=None):
+    """
+    Shared storage instance for "locmem", "database" or "cache"
+    (default: THROTTLE_STORAGE).
+    """
+    name = name or settings.THROTTLE_STORAGE
+    with _storages_lock:
+        if name not in _storages:
+            if name == "locmem":
+                _storages[name] = LocMemStorage()
+            elif name == "database":
+                _storages[name] = DatabaseStorage()
+            elif name == "cache":
+                _storages[name] = CacheStorage(settings.THROTTLE_CACHE_ALIAS)
+            else:
+                raise ImproperlyConfigured(f"Unknown throttle storage {name!r}.")
+        return _storages[name]
+
+
+# -------------------------------
+# THROTTLE
+# -------------------------------
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Per-view rate limit over a sliding window, approximated from two fixed
+    windows: previous * (share of it still inside the window) + current.
+
+    The view sets `throttle_scope` (its rate comes from DEFAULT_THROTTLE_RATES)
+    and may set `throttle_storage`. Authenticated requests are limited per
+    user, anonymous ones per client IP.
+    """
+    scope_attr = "throttle_scope"
+    storage_attr = "throttle_storage"
+
+    def __init__(self):
+        # The rate depends on the view, so it's resolved in allow_request()
+        self.wait_seconds = None
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f"user:{request.user.pk}"
+        else:
+            ident = f"ip:{self.get_ident(request)}"
+        return f"throttle:{self.scope}:{ident}"
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        if self.num_requests is None:
+            return True
+
+        key = self.get_cache_key(request, view)
+        storage = get_storage(getattr(view, self.storage_attr, None))
+        now = self.timer()
+        window = int(now // self.duration) * self.duration
+
+        previous, current = storage.hit(key, window, self.duration, now)
+        elapsed = (now - window) / self.duration
+        if previous * (1 - elapsed) + current <= self.num_requests:
+            return True
+
+        storage.undo(key, window)
+        self.wait_seconds = self.retry_after(previous, current - 1, window, now)
+        return False
+
+    def retry_after(self, previous, current, window, now):
+        """
+        Seconds until one more request fits under the limit.
+        """
+        room = self.num_requests - 1
+        if room < 0:
+            return None
+        if current <= room:
+            # Wait for enough of the previous window to slide out
+            share = 1 - (room - current) / previous
+            return max(0.0, window + share * self.duration - now)
+        # Wait for the next window, then for enough of this one to slide out
+        share = 1 - room / current
+        return window + self.duration * (1 + share) - now
+
+    def wait(self):
+        return math.ceil(self.wait_seconds) if self.wait_seconds is not None else None
@@ -1,9 +1,20 @@
-from django.urls import path
+from django.urls import path, re_path
 from rest_framework_simplejwt.views import TokenRefreshView
 
+from .async_views import (
+    AsyncMyBookingsAPIView,
+    AsyncTripListAPIView,
+    AsyncTripSeatsAPIView,
+)
 from .views import (
     api_root,
     TripListAPIView,
+    CityAutocompleteAPIView,
+    CacheStatsAPIView,
+    TripExportAPIView,
+    BookingExportAPIView,
+    JourneyPlannerAPIView,
+    FareCalendarAPIView,
     CreateBookingAPIView,
     MyBookingsAPIView,
     CancelBookingAPIView,
@@ -23,6 +34,14 @@ urlpatterns = [
 
     # Trips
     path("trips/", TripListAPIView.as_view(), name="api-trips"),
+    path("cities/", CityAutocompleteAPIView.as_view(), name="api-cities"),
+    path("journeys/", JourneyPlannerAPIView.as_view(), name="api-journeys"),
+    path("cache/stats/", CacheStatsAPIView.as_view(), name="api-cache-stats"),
+    path(
+        "routes/<int:route_id>/fares/",
+        FareCalendarAPIView.as_view(),
+        name="api-fare-calendar",
+    ),
 
     # Bookings
     path("book/", CreateBookingAPIView.as_view(), name="api-book"),
@@ -33,6 +52,27 @@ urlpatterns = [
         name="api-cancel-booking",
     ),
 
+    # Exports (staff)
+    re_path(
+        r"^exports/trips\.(?P<export_format>ndjson|csv)$",
+        TripExportAPIView.as_view(),
+        name="api-export-trips",
+    ),
+    re_path(
+        r"^exports/bookings\.(?P<export_format>ndjson|csv)$",
+        BookingExportAPIView.as_view(),
+        name="api-export-bookings",
+    ),
+
+    # Async variants (served without a thread per request under ASGI)
+    path("async/trips/", AsyncTripListAPIView.as_view(), name="api-async-trips"),
+    path(
+        "async/trips/<int:trip_id>/seats/",
+        AsyncTripSeatsAPIView.as_view(),
+        name="api-async-trip-seats",
+    ),
+    path("async/bookings/", AsyncMyBookingsAPIView.as_view(), name="api-async-my-bookings"),
+
     # Payments (Fake)
     path(
         "bookings/<int:booking_id>/pay/",
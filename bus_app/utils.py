@@ -1,22 +1,102 @@
-from django.db.models import Q
+from datetime import date, datetime, time, timedelta
 
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 
-def filter_trips(trips_queryset, from_city=None, to_city=None, search_text=None):
+from .cities import resolve_city_ids
+from .search import search_trips
+
+
+def parse_date_param(value, name="date"):
     """
-    Filter trips by from_city, to_city, or search text.
+    Parse a YYYY-MM-DD query parameter (date objects pass through).
     """
-    if from_city:
-        trips_queryset = trips_queryset.filter(route__location_from__icontains=from_city)
-    if to_city:
-        trips_queryset = trips_queryset.filter(route__location_to__icontains=to_city)
-    if search_text:
+    if value is None or value == "" or isinstance(value, date):
+        return value or None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError(f"{name} must be a valid date (YYYY-MM-DD).")
+    return parsed
+
+
+def parse_month_param(value, name="month"):
+    """
+    Parse a YYYY-MM query parameter into the first day of that month.
+    """
+    parsed = None
+    if value:
+        try:
+            parsed = parse_date(f"{value}-01")
+        except ValueError:
+            parsed = None
+    if parsed is None:
+        raise ValidationError(f"{name} must be a valid month (YYYY-MM).")
+    return parsed
+
+
+def start_of_day(day):
+    """
+    Aware datetime of local midnight at the start of `day`.
+    """
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_trips_by_date(trips_queryset, travel_date=None, date_from=None, date_to=None):
+    """
+    Filter trips departing on `travel_date` and/or within [date_from, date_to]
+    (both days inclusive) in the current timezone.
+
+    Days become half-open datetime ranges on departure_time instead of
+    departure_time__date, so the departure_time index stays usable.
+    """
+    travel_date = parse_date_param(travel_date, "date")
+    date_from = parse_date_param(date_from, "date_from")
+    date_to = parse_date_param(date_to, "date_to")
+
+    if travel_date:
+        trips_queryset = trips_queryset.filter(
+            departure_time__gte=start_of_day(travel_date),
+            departure_time__lt=start_of_day(travel_date + timedelta(days=1)),
+        )
+    if date_from:
+        trips_queryset = trips_queryset.filter(departure_time__gte=start_of_day(date_from))
+    if date_to:
         trips_queryset = trips_queryset.filter(
-            Q(bus__bus_number__icontains=search_text) |
-            Q(route__route_name__icontains=search_text)
+            departure_time__lt=start_of_day(date_to + timedelta(days=1))
         )
     return trips_queryset
 
 
+def filter_trips(trips_queryset, from_city=None, to_city=None, search_text=None,
+                 travel_date=None, date_from=None, date_to=None):
+    """
+    Filter trips by from_city, to_city, search text, or departure date.
+    Raises ValidationError for malformed dates.
+
+    City text is resolved to city ids through the in-memory CityIndex
+    (names, aliases, prefixes), so routes are matched by indexed foreign key.
+    Search text orders results by relevance (see bus_app.search).
+    """
+    city_filters = (
+        (from_city, "route__origin_id__in"),
+        (to_city, "route__destination_id__in"),
+    )
+    for text, lookup in city_filters:
+        if not text:
+            continue
+        city_ids = resolve_city_ids(text)
+        if not city_ids:
+            return trips_queryset.none()
+        trips_queryset = trips_queryset.filter(**{lookup: city_ids})
+    if search_text:
+        trips_queryset = search_trips(trips_queryset, search_text)
+    return filter_trips_by_date(trips_queryset, travel_date, date_from, date_to)
+
+
 def sort_trips(trips_queryset, sort_field="departure_time"):
     """
     Sort trips by any field.
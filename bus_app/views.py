@@ -1,7 +1,11 @@
+from datetime import timedelta
+
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
-from django.utils import timezone
+from django.core.exceptions import ValidationError
 from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
@@ -13,11 +17,35 @@ from rest_framework.parsers import JSONParser
 from rest_framework.pagination import PageNumberPagination
 
 from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.authentication import JWTAuthentication
 
-from .models import Trip, Booking
-from .serializers import TripSerializer, BookingSerializer
-from .services import create_booking, cancel_booking
+from .authentication import CachedJWTAuthentication
+from .cities import autocomplete_cities, get_city_index, resolve_city_ids
+from .etags import etag_matches, trip_etag
+from .exports import (
+    BOOKING_EXPORT_FIELDS,
+    EXPORT_CONTENT_TYPES,
+    TRIP_EXPORT_FIELDS,
+    booking_export_queryset,
+    stream_export,
+    trip_export_queryset,
+)
+from .fares import get_fare_calendar
+from .fast_serializers import FastBookingSerializer, FastTripSerializer
+from .idempotency import idempotent
+from .journeys import DEFAULT_MAX_LEGS, DEFAULT_MIN_TRANSFER_MINUTES, plan_journeys
+from .models import Route, Trip, Booking
+from .pagination import KeysetPagination, wants_cursor_pagination
+from .response_cache import trip_search_cache
+from .seats import SeatAvailability
+from .serializers import (
+    FareDaySerializer,
+    SeatSelectionSerializer,
+    TripSerializer,
+    parse_field_selection,
+)
+from .utils import filter_trips, parse_date_param, parse_month_param, start_of_day
+from .services import cancel_booking, claim_seats, confirm_payment
+from .throttling import SlidingWindowThrottle
 from .permissions import IsBookingOwner
 
 
@@ -45,6 +73,8 @@ def api_root(request, format=None):  # noqa
             "register": reverse("api-register", request=request, format=format),
             "login": reverse("api-login", request=request, format=format),
             "trips": reverse("api-trips", request=request, format=format),
+            "cities": reverse("api-cities", request=request, format=format),
+            "journeys": reverse("api-journeys", request=request, format=format),
             "book": reverse("api-book", request=request, format=format),
             "my_bookings": reverse("api-my-bookings", request=request, format=format),
         }
@@ -64,6 +94,8 @@ class TripPagination(PageNumberPagination):
 class TripListAPIView(APIView):
     permission_classes = [AllowAny]
 
+    MAX_BULK_TRIP_IDS = 50
+
     ALLOWED_SORT_FIELDS = {
         "price": "price",
         "-price": "-price",
@@ -73,9 +105,22 @@ class TripListAPIView(APIView):
 
     def get(self, request):  # noqa
         trip_id = request.query_params.get("trip_id")
+        # ?fields= / ?expand=; available_seats stays on by default here
+        selection = parse_field_selection(request.query_params, default_expand=["available_seats"])
 
         # -------- Single Trip Detail --------
         if trip_id:
+            if not trip_id.isdigit():
+                return Response(
+                    {"error": "Trip not found"},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+
+            # Unchanged trip: 304 before touching the database
+            etag = trip_etag(trip_id, variant=selection)
+            if etag_matches(request, etag):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
             try:
                 trip = Trip.objects.select_related("bus", "route").get(
                     id=trip_id,
@@ -87,69 +132,355 @@ class TripListAPIView(APIView):
                     status=status.HTTP_404_NOT_FOUND
                 )
 
-            serializer = TripSerializer(trip)
-            return Response(serializer.data)
+            serializer = TripSerializer(trip, context=selection)
+            return Response(serializer.data, headers={"ETag": etag})
+
+        # -------- Bulk Trip Detail (?ids=1,2,3) --------
+        if request.query_params.get("ids"):
+            return self.get_many(request, selection)
 
+        # -------- Cached Response --------
+        # The payload doesn't depend on the user, only on the query
+        params = request.query_params
+        cache_versions = trip_search_cache.versions_for(params)
+        cached = trip_search_cache.get(request, cache_versions)
+        if cached is not None:
+            data, etag = cached
+            if etag_matches(request, etag):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+            return Response(data, headers={"ETag": etag})
+
+        try:
+            trips, sort_field, cursor_mode = self.search_queryset(params)
+        except ValidationError as e:
+            return Response(
+                {"error": e.messages[0]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # -------- Pagination --------
+        if cursor_mode:
+            id_field = "-id" if sort_field.startswith("-") else "id"
+            paginator = KeysetPagination(ordering=(sort_field, id_field))
+        else:
+            paginator = TripPagination()
+        # Fast path: render .values() rows (same JSON as TripSerializer)
+        serializer = FastTripSerializer(context=selection)
+        rows = serializer.values(trips, sort_field.lstrip("-"), "id")  # + keyset columns
+        page = paginator.paginate_queryset(rows, request)
+        response = paginator.get_paginated_response(serializer.serialize(page))
+        response["ETag"] = trip_search_cache.set(request, cache_versions, response.data)
+        return response
+
+    @classmethod
+    def search_queryset(cls, params):
+        """
+        (trips, sort_field, cursor_mode) for a list request.
+        Raises ValidationError for bad filters.
+        """
         # -------- Base Query --------
-        trips = Trip.objects.select_related("bus", "route").filter(
-            is_active=True,
-            departure_time__gte=timezone.now()
-        )
+        trips = Trip.objects.select_related("bus", "route").upcoming()
 
         # -------- Filtering --------
-        from_city = request.query_params.get("from_city")
-        to_city = request.query_params.get("to_city")
-        search = request.query_params.get("search")
-        travel_date = request.query_params.get("date")  # YYYY-MM-DD
+        trips = filter_trips(
+            trips,
+            from_city=params.get("from_city"),
+            to_city=params.get("to_city"),
+            search_text=params.get("search"),
+            travel_date=params.get("date"),  # YYYY-MM-DD
+            date_from=params.get("date_from"),
+            date_to=params.get("date_to"),
+        )
+
+        # -------- Sorting (Safe) --------
+        # Searches stay in relevance order unless a sort is requested
+        # (cursor pages need a real column to seek on)
+        sort_param = params.get("sort", "departure_time")
+        sort_field = cls.ALLOWED_SORT_FIELDS.get(sort_param, "departure_time")
+        cursor_mode = wants_cursor_pagination(params)
+        if not params.get("search") or "sort" in params or cursor_mode:
+            trips = trips.order_by(sort_field)
+        return trips, sort_field, cursor_mode
+
+    @classmethod
+    def parse_ids(cls, params):
+        """
+        Distinct trip ids from ?ids=, in order. Raises ValidationError.
+        """
+        try:
+            trip_ids = list(dict.fromkeys(
+                int(value) for value in params["ids"].split(",") if value.strip()
+            ))
+        except ValueError:
+            raise ValidationError("ids must be a comma-separated list of trip ids")
+        if len(trip_ids) > cls.MAX_BULK_TRIP_IDS:
+            raise ValidationError(f"At most {cls.MAX_BULK_TRIP_IDS} ids per request")
+        return trip_ids
+
+    def get_many(self, request, selection):
+        """
+        Active trips for up to MAX_BULK_TRIP_IDS ids, in the requested order:
+        one joined query for the trips and one grouped availability query.
+        """
+        try:
+            trip_ids = self.parse_ids(request.query_params)
+        except ValidationError as e:
+            return Response(
+                {"error": e.messages[0]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        if from_city:
-            trips = trips.filter(route__location_from__icontains=from_city)
+        serializer = FastTripSerializer(context=selection)
+        rows = serializer.values(Trip.objects.filter(pk__in=trip_ids, is_active=True), "id")
+        by_id = {row["id"]: row for row in rows}
 
-        if to_city:
-            trips = trips.filter(route__location_to__icontains=to_city)
+        return Response({
+            "results": serializer.serialize(by_id[pk] for pk in trip_ids if pk in by_id),
+            "missing": [pk for pk in trip_ids if pk not in by_id],
+        })
 
-        if travel_date:
-            trips = trips.filter(departure_time__date=travel_date)
 
-        if search:
-            trips = trips.filter(
-                Q(bus__bus_number__icontains=search) |
-                Q(route__route_name__icontains=search)
+# -----------------------
+# STREAMING EXPORTS (STAFF)
+# -----------------------
+class ExportAPIView(APIView):
+    """
+    Streams every matching row as NDJSON or CSV (/api/exports/<name>.<format>),
+    reading the database in chunks so memory stays flat.
+    Filters: ?date_from= / ?date_to= on departure date, plus the id
+    filters in `id_params` ({export_queryset kwarg: query param}).
+
+    Subclasses set `export_queryset` (a bus_app.exports function taking
+    date_from, date_to and the id filters as keyword arguments), `filename`
+    and `fields`.
+    """
+    permission_classes = [IsAdminUser]
+    export_queryset = None
+    filename = None
+    fields = None
+    id_params = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name in ("export_queryset", "filename", "fields"):
+            if getattr(cls, name) is None:
+                raise TypeError(f"{cls.__name__} must set {name}.")
+
+    def get(self, request, export_format):  # noqa
+        params = request.query_params
+        try:
+            queryset = self.export_queryset(
+                date_from=parse_date_param(params.get("date_from"), "date_from"),
+                date_to=parse_date_param(params.get("date_to"), "date_to"),
+                **{
+                    kwarg: self.int_param(params, name)
+                    for kwarg, name in self.id_params.items()
+                },
             )
+        except ValidationError as e:
+            return Response({"error": e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
 
-        # -------- Sorting (Safe) --------
-        sort_param = request.query_params.get("sort", "departure_time")
-        sort_field = self.ALLOWED_SORT_FIELDS.get(sort_param, "departure_time")
-        trips = trips.order_by(sort_field)
+        response = StreamingHttpResponse(
+            stream_export(queryset, self.fields, export_format),
+            content_type=EXPORT_CONTENT_TYPES[export_format],
+        )
+        filename = f"{self.filename}-{timezone.localdate():%Y%m%d}.{export_format}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    @staticmethod
+    def int_param(params, name):
+        value = params.get(name)
+        if value and not value.isdigit():
+            raise ValidationError(f"{name} must be an id.")
+        return int(value) if value else None
+
+
+class TripExportAPIView(ExportAPIView):
+    export_queryset = staticmethod(trip_export_queryset)
+    filename = "trips"
+    fields = TRIP_EXPORT_FIELDS
+    id_params = {"route_id": "route"}
+
+
+class BookingExportAPIView(ExportAPIView):
+    export_queryset = staticmethod(booking_export_queryset)
+    filename = "bookings"
+    fields = BOOKING_EXPORT_FIELDS
+    id_params = {"trip_id": "trip"}
+
+
+# -----------------------
+# RESPONSE CACHE STATS
+# -----------------------
+class CacheStatsAPIView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):  # noqa
+        return Response({"trip_search": trip_search_cache.stats()})
+
+    def delete(self, request):  # noqa
+        trip_search_cache.reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+# -----------------------
+# CITY AUTOCOMPLETE
+# -----------------------
+class CityAutocompleteAPIView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request):  # noqa
+        direction = request.query_params.get("direction", "all")
+        if direction not in ("all", "from", "to"):
+            direction = "all"
+
+        cities = autocomplete_cities(request.query_params.get("q"), direction=direction)
+        return Response({"results": cities})
 
-        # -------- Pagination --------
-        paginator = TripPagination()
-        page = paginator.paginate_queryset(trips, request)
 
-        serializer = TripSerializer(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+# -----------------------
+# FARE CALENDAR
+# -----------------------
+class FareCalendarAPIView(APIView):
+    """
+    Lowest fare and seats left per day of a month for one route:
+    /api/routes/<route_id>/fares/?month=YYYY-MM (default: current month)
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, route_id):  # noqa
+        route = Route.objects.filter(pk=route_id).only("pk", "route_name").first()
+        if route is None:
+            return Response(
+                {"error": "Route not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        month = request.query_params.get("month") or f"{timezone.localdate():%Y-%m}"
+        try:
+            month = parse_month_param(month)
+        except ValidationError as e:
+            return Response({"error": e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "route": route.pk,
+            "route_name": route.route_name,
+            "month": f"{month:%Y-%m}",
+            "days": FareDaySerializer(get_fare_calendar(route.pk, month), many=True).data,
+        })
+
+
+# -----------------------
+# JOURNEY PLANNER (MULTI-LEG)
+# -----------------------
+class JourneyPlannerAPIView(APIView):
+    """
+    Earliest-arrival journeys between two cities, including connections:
+    /api/journeys/?from=Karachi&to=Quetta&date=YYYY-MM-DD&min_transfer=30&max_legs=4
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):  # noqa
+        params = request.query_params
+
+        origin_ids = resolve_city_ids(params.get("from"))
+        destination_ids = resolve_city_ids(params.get("to"))
+        if not origin_ids or not destination_ids:
+            return Response(
+                {"error": "from and to must be known cities"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            travel_date = parse_date_param(params.get("date"), "date")
+            min_transfer = int(params.get("min_transfer", DEFAULT_MIN_TRANSFER_MINUTES))
+            max_legs = int(params.get("max_legs", DEFAULT_MAX_LEGS))
+        except ValidationError as e:
+            return Response({"error": e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError:
+            return Response(
+                {"error": "min_transfer and max_legs must be integers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if min_transfer < 0 or max_legs < 1:
+            return Response(
+                {"error": "min_transfer must be >= 0 and max_legs >= 1"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        journeys = plan_journeys(
+            origin_ids[0],
+            destination_ids[0],
+            depart_after=start_of_day(travel_date) if travel_date else None,
+            min_transfer=timedelta(minutes=min_transfer),
+            max_legs=max_legs,
+        )
+
+        # Load every leg of every journey in one query
+        trip_ids = {leg.trip_id for journey in journeys for leg in journey}
+        trips = Trip.objects.select_related("bus", "route").in_bulk(trip_ids)
+        context = {"availability": SeatAvailability(trips.values())}
+
+        results = []
+        for journey in journeys:
+            legs = [trips[leg.trip_id] for leg in journey if leg.trip_id in trips]
+            if len(legs) != len(journey):
+                continue
+            departure, arrival = legs[0].departure_time, legs[-1].arrival_time
+            results.append({
+                "departure_time": departure,
+                "arrival_time": arrival,
+                "duration_minutes": int((arrival - departure).total_seconds() // 60),
+                "transfers": len(legs) - 1,
+                "total_price": str(sum(leg.price for leg in legs)),
+                "legs": TripSerializer(legs, many=True, context=context).data,
+            })
+
+        names = get_city_index().names
+        return Response({
+            "from": names.get(origin_ids[0]),
+            "to": names.get(destination_ids[0]),
+            "journeys": results,
+        })
 
 
 # -----------------------
 # CREATE BOOKING (RESERVE SEAT)
 # -----------------------
 class CreateBookingAPIView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
     parser_classes = [JSONParser]
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = "booking"
 
+    @idempotent
     def post(self, request):  # noqa
         trip_id = request.data.get("trip")
         seat_number = request.data.get("seat_number")
+        seats = request.data.get("seats")
 
-        if not trip_id or not seat_number:
+        if not trip_id or not (seat_number or seats):
             return Response(
-                {"error": "trip and seat_number are required"},
+                {"error": "trip and seat_number (or seats) are required"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        # Group booking: "seats": [..], otherwise a single "seat_number"
+        if seats is None:
+            seats = [seat_number]
+
+        selection = SeatSelectionSerializer(data={"seats": seats})
+        if not selection.is_valid():
+            return Response(
+                {"error": "seats must be a list of integers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        seats = selection.validated_data["seats"]
+
         try:
-            trip = Trip.objects.get(id=trip_id, is_active=True)
+            trip = Trip.objects.select_related("bus").get(id=trip_id, is_active=True)
         except Trip.DoesNotExist:
             return Response(
                 {"error": "Trip not found"},
@@ -157,10 +488,10 @@ class CreateBookingAPIView(APIView):
             )
 
         try:
-            booking = create_booking(
+            claim = claim_seats(
                 user=request.user,
                 trip=trip,
-                seat_number=seat_number
+                seat_numbers=seats
             )
         except Exception as e:
             return Response(
@@ -168,10 +499,30 @@ class CreateBookingAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        if not claim.ok:
+            return Response(
+                {
+                    "error": claim.message,
+                    "code": claim.status.value,
+                    "taken_seats": list(claim.taken_seats),
+                },
+                status=status.HTTP_409_CONFLICT
+            )
+
+        if seat_number is not None and len(claim.bookings) == 1:
+            booking = claim.booking
+            return Response({
+                "message": "Seat reserved. Please complete payment.",
+                "booking_id": booking.id,  # noqa
+                "payment_url": f"/api/bookings/{booking.id}/pay/"  # noqa
+            }, status=status.HTTP_201_CREATED)
+
         return Response({
-            "message": "Seat reserved. Please complete payment.",
-            "booking_id": booking.id,  # noqa
-            "payment_url": f"/api/bookings/{booking.id}/pay/"  # noqa
+            "message": f"{len(claim.bookings)} seats reserved. Please complete payment.",
+            "booking_ids": [booking.id for booking in claim.bookings],  # noqa
+            "payment_urls": [
+                f"/api/bookings/{booking.id}/pay/" for booking in claim.bookings  # noqa
+            ]
         }, status=status.HTTP_201_CREATED)
 
 
@@ -179,19 +530,40 @@ class CreateBookingAPIView(APIView):
 # MY BOOKINGS
 # -----------------------
 class MyBookingsAPIView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):  # noqa
+        bookings = self.user_bookings(request.user, request.query_params)
+
+        # Pagination
+        if wants_cursor_pagination(request.query_params):
+            paginator = KeysetPagination(ordering=("-created_at", "-id"))
+        else:
+            paginator = PageNumberPagination()
+            paginator.page_size = 10  # 10 bookings per page
+
+        # Fast path: render .values() rows (same JSON as BookingSerializer)
+        # ?fields= / ?expand=; trip_detail.available_seats only on request
+        serializer = FastBookingSerializer(context=parse_field_selection(request.query_params))
+        rows = serializer.values(bookings, "created_at", "id")  # + keyset columns
+        page = paginator.paginate_queryset(rows, request)
+        return paginator.get_paginated_response(serializer.serialize(page))
+
+    @staticmethod
+    def user_bookings(user, params):
+        """
+        The user's bookings, newest first, with the ?q= / ?status= filters.
+        """
         bookings = (
             Booking.objects
-            .filter(user=request.user)
+            .filter(user=user)
             .select_related("trip", "trip__bus", "trip__route")
-            .order_by("-created_at")  # newest first
+            .order_by("-created_at", "-id")  # newest first
         )
 
         # Optional search query
-        q = request.query_params.get("q")
+        q = params.get("q")
         if q:
             bookings = bookings.filter(
                 Q(seat_number__icontains=q) |
@@ -200,26 +572,19 @@ class MyBookingsAPIView(APIView):
             )
 
         # Optional status filter
-        status_filter = request.query_params.get("status")
+        status_filter = params.get("status")
         if status_filter == "confirmed":
             bookings = bookings.filter(is_confirmed=True, is_cancelled=False)
         elif status_filter == "cancelled":
             bookings = bookings.filter(is_cancelled=True)
-
-        # Pagination
-        paginator = PageNumberPagination()
-        paginator.page_size = 10  # 10 bookings per page
-        paginated_bookings = paginator.paginate_queryset(bookings, request)
-
-        serializer = BookingSerializer(paginated_bookings, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        return bookings
 
 
 # -----------------------
 # CANCEL BOOKING
 # -----------------------
 class CancelBookingAPIView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated, IsBookingOwner]
 
     def post(self, request, booking_id):
@@ -253,6 +618,8 @@ class CancelBookingAPIView(APIView):
 @permission_classes([IsAdminUser])
 class RegisterAPIView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = "register"
 
     def post(self, request):  # noqa
         username = request.data.get("username")
@@ -294,6 +661,8 @@ class RegisterAPIView(APIView):
 @permission_classes([IsAdminUser])
 class LoginAPIView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = "login"
 
     def post(self, request):  # noqa
         username = request.data.get("username")
@@ -321,17 +690,22 @@ class LoginAPIView(APIView):
 # FAKE PAYMENT API
 # -----------------------
 class FakePaymentAPIView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
+    @idempotent
     def post(self, request, booking_id):  # noqa
         try:
             booking = Booking.objects.get(id=booking_id, user=request.user)
         except Booking.DoesNotExist:
             return Response({"error": "Booking not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        booking.payment_status = "paid"
-        booking.is_confirmed = True
-        booking.save()
+        try:
+            confirm_payment(booking=booking)
+        except Exception as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
         return Response({"message": "Payment successful. Booking confirmed"})
@@ -7,14 +7,41 @@ from django.utils import timezone
 from django.db import transaction
 from django.db.models import Q
 from django.core.paginator import Paginator
-from datetime import timedelta
+from bus_app.cities import get_city_catalogue
 from bus_app.models import Booking, Trip
+from bus_app.pagination import InvalidCursor, keyset_page, wants_cursor_pagination
+from bus_app.seats import SeatAvailability
+from bus_app.services import claim_seat, confirm_payment, mark_cancelled
 from bus_app.utils import filter_trips
 
 # Hold time for pending bookings (before payment) in minutes
 HOLD_TIME_MINUTES = 5
 
 
+def _cursor_page(request, queryset, ordering, per_page=10):
+    """
+    Keyset page of `queryset` with querystrings for its next/previous links.
+    An invalid cursor falls back to the first page.
+    """
+    try:
+        page = keyset_page(queryset, ordering=ordering, page_size=per_page,
+                           cursor=request.GET.get("cursor"))
+    except InvalidCursor:
+        page = keyset_page(queryset, ordering=ordering, page_size=per_page)
+
+    def link(cursor):
+        if cursor is None:
+            return None
+        params = request.GET.copy()
+        params["cursor"] = cursor
+        params.pop("page", None)
+        return params.urlencode()
+
+    page.next_query = link(page.next_cursor)
+    page.previous_query = link(page.previous_cursor)
+    return page
+
+
 def welcome_page(request):
     """Landing page. Redirect logged-in users to trips page."""
     if request.user.is_authenticated:
@@ -24,10 +51,7 @@ def welcome_page(request):
 
 @login_required
 def trips_page(request):
-    trips_qs = Trip.objects.filter(
-        is_active=True,
-        departure_time__gte=timezone.now()
-    )
+    trips_qs = Trip.objects.select_related("bus", "route").upcoming()
 
     # Get filter/search/sort from GET parameters
     from_city = request.GET.get("from_city")
@@ -35,7 +59,7 @@ def trips_page(request):
     search = request.GET.get("search")
     sort = request.GET.get("sort", "departure_time")  # default: ascending by departure_time
 
-    # Filter trips
+    # Filter trips (a search is ranked by relevance)
     trips_qs = filter_trips(trips_qs, from_city, to_city, search)
 
     # Validate sort field
@@ -43,27 +67,40 @@ def trips_page(request):
     if sort not in allowed_sort_fields:
         sort = "departure_time"
 
-    trips_qs = trips_qs.order_by(sort)
-
-    # Pagination: 10 trips per page
-    paginator = Paginator(trips_qs, 10)
-    page_number = request.GET.get("page")
-    trips_page_obj = paginator.get_page(page_number)
-
-    # Calculate available seats for trips on this page
+    cursor_mode = wants_cursor_pagination(request.GET)
+    by_relevance = bool(search) and not request.GET.get("sort") and not cursor_mode
+    if not by_relevance:
+        trips_qs = trips_qs.order_by(sort)
+
+    # Pagination: 10 trips per page (opt-in keyset mode: ?pagination=cursor)
+    cursor_page = None
+    if cursor_mode:
+        id_field = "-id" if sort.startswith("-") else "id"
+        cursor_page = trips_page_obj = _cursor_page(request, trips_qs, (sort, id_field))
+    else:
+        paginator = Paginator(trips_qs, 10)
+        page_number = request.GET.get("page")
+        trips_page_obj = paginator.get_page(page_number)
+
+    # Calculate available seats for trips on this page (one query)
+    availability = SeatAvailability(trips_page_obj)
     for trip in trips_page_obj:
-        trip.available_seats_list = trip.available_seats()
+        trip.seat_map = availability.available_seats(trip)
+
+    # Cached dropdown options (see bus_app.cities)
+    cities = get_city_catalogue()
 
     # Pass all required data to template
     context = {
         "trips": trips_page_obj,
         "page_obj": trips_page_obj,
-        "from_cities": Trip.objects.values_list("route__location_from", flat=True).distinct(),
-        "to_cities": Trip.objects.values_list("route__location_to", flat=True).distinct(),
+        "cursor_page": cursor_page,
+        "from_cities": cities["from"],
+        "to_cities": cities["to"],
         "selected_from": from_city,
         "selected_to": to_city,
         "selected_search": search,
-        "selected_sort": sort,
+        "selected_sort": "" if by_relevance else sort,
     }
 
     return render(request, "frontend/home.html", context)
@@ -117,23 +154,15 @@ def booking_page(request, trip_id):
     Seat booking page for a specific trip.
     Implements temporary seat hold for pending bookings.
     """
-    trip = get_object_or_404(Trip, id=trip_id)
+    trip = get_object_or_404(Trip.objects.select_related("bus", "route"), id=trip_id)
 
     # ❗ Prevent booking after departure
     if trip.departure_time <= timezone.now():
         messages.error(request, "This trip has already departed. Booking closed.")
         return redirect("trips-page")
 
-    # Release expired pending bookings
-    Booking.objects.filter(
-        trip=trip,
-        is_confirmed=False,
-        payment_status="pending",
-        hold_expires_at__lt=timezone.now()
-    ).delete()
-
-    booked_seats = trip.booked_seats()
-    available_seats = trip.available_seats()
+    # Expired holds are ignored here and released by the expire_holds command
+    seat_map = trip.available_seats()
 
     if request.method == "POST":
         seat_number = request.POST.get("seat_number")
@@ -143,35 +172,34 @@ def booking_page(request, trip_id):
 
         seat_number = int(seat_number)
 
-        if seat_number not in available_seats:
+        if seat_number not in seat_map:
             messages.error(request, f"Seat {seat_number} is already booked or on hold!")
             return redirect("booking-page", trip_id=trip.id)  # noqa
 
         try:
-            with transaction.atomic():
-                # Lock seat to prevent race conditions
-                booking = Booking.objects.create(
-                    user=request.user,
-                    trip=trip,
-                    seat_number=seat_number,
-                    is_confirmed=False,
-                    payment_status="pending",
-                    hold_expires_at=timezone.now() + timedelta(minutes=HOLD_TIME_MINUTES)
-                )
+            claim = claim_seat(
+                user=request.user,
+                trip=trip,
+                seat_number=seat_number,
+                hold_minutes=HOLD_TIME_MINUTES
+            )
         except Exception:  # noqa
             messages.error(request, f"Seat {seat_number} could not be reserved. Try again.")
             return redirect("booking-page", trip_id=trip.id)  # noqa
 
+        if not claim.ok:
+            messages.error(request, f"Seat {seat_number}: {claim.message}")
+            return redirect("booking-page", trip_id=trip.id)  # noqa
+
+        booking = claim.booking
+
         messages.success(request,
                          f"Seat {seat_number} reserved! Please complete payment within {HOLD_TIME_MINUTES} minutes.")
         return redirect("payment-page", booking_id=booking.id)  # noqa
 
-    total_seats = trip.bus.capacity
-    seats = [{"number": i, "booked": i in booked_seats} for i in range(1, total_seats + 1)]
-
     return render(request, "frontend/booking.html", {
         "trip": trip,
-        "seats": seats
+        "seat_map": seat_map
     })
 
 
@@ -189,11 +217,7 @@ def payment_page(request, booking_id):
 
     if request.method == "POST":
         try:
-            with transaction.atomic():
-                booking.payment_status = "paid"
-                booking.is_confirmed = True
-                booking.hold_expires_at = None
-                booking.save()
+            confirm_payment(booking=booking)
         except Exception as e:
             messages.error(request, f"Payment failed: {str(e)}")
             return redirect("payment-page", booking_id=booking.id)  # noqa
@@ -237,13 +261,19 @@ def my_bookings_page(request):
     # Sorting
     bookings_list = bookings_list.order_by(sort_by)
 
-    # Pagination: 10 bookings per page
-    paginator = Paginator(bookings_list, 10)
-    page_number = request.GET.get("page")
-    bookings = paginator.get_page(page_number)
+    # Pagination: 10 bookings per page (opt-in keyset mode: ?pagination=cursor)
+    cursor_page = None
+    if wants_cursor_pagination(request.GET) and sort_by in ("created_at", "-created_at"):
+        id_field = "-id" if sort_by.startswith("-") else "id"
+        cursor_page = bookings = _cursor_page(request, bookings_list, (sort_by, id_field))
+    else:
+        paginator = Paginator(bookings_list, 10)
+        page_number = request.GET.get("page")
+        bookings = paginator.get_page(page_number)
 
     return render(request, "frontend/my_bookings.html", {
         "bookings": bookings,
+        "cursor_page": cursor_page,
         "now": timezone.now(),
     })
 
@@ -264,20 +294,18 @@ def cancel_booking_page(request, booking_id):
 
     try:
         with transaction.atomic():
-            booking.is_cancelled = True
-            booking.is_confirmed = False
-
-            if booking.payment_status == "paid":
-                booking.payment_status = "refunded"
-                messages.success(request,
-                                 f"Booking for seat {booking.seat_number} has been cancelled. Refund will be processed.")
-            else:
-                messages.success(request, f"Booking for seat {booking.seat_number} has been cancelled.")
-
-            booking.save()
+            cancelled = mark_cancelled(booking=booking, refund=True)
     except Exception as e:
         messages.error(request, f"Failed to cancel booking: {str(e)}")
         return redirect("my-bookings-page")
 
+    if not cancelled:
+        messages.info(request, "This booking has already been cancelled.")
+    elif booking.payment_status == "refunded":
+        messages.success(request,
+                         f"Booking for seat {booking.seat_number} has been cancelled. Refund will be processed.")
+    else:
+        messages.success(request, f"Booking for seat {booking.seat_number} has been cancelled.")
+
     # ✅ Redirect to my bookings so seats are recalculated
     return redirect("my-bookings-page")